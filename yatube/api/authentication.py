@@ -0,0 +1,168 @@
+import time
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Отзывы и отметки об изменении пользователя хранятся в отдельном общем
+# кэше без вытеснения: потерянная запись вернула бы отозванный токен.
+# Запросы читают их копии из кэша по умолчанию (token_state_key,
+# user_state_key), а в TOKEN_CACHE идут только при промахе.
+TOKEN_CACHE = 'tokens'
+
+
+def token_user_key(jti):
+    return f'jwt-user:{jti}'
+
+
+def revoked_token_key(jti):
+    return f'jwt-revoked:{jti}'
+
+
+def revoked_before_key(user_id):
+    return f'jwt-revoked-before:{user_id}'
+
+
+def user_changed_key(user_id):
+    return f'jwt-user-changed:{user_id}'
+
+
+def token_state_key(jti):
+    return f'jwt-token-state:{jti}'
+
+
+def user_state_key(user_id):
+    return f'jwt-user-state:{user_id}'
+
+
+def forget_state(key):
+    """Удалить копию состояния отзыва сейчас и еще раз после коммита.
+
+    Повторное удаление убирает копию, которую параллельный запрос успел
+    загрузить до коммита текущей транзакции.
+    """
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def issued_at(token):
+    """Время выпуска токена.
+
+    Токены api.views выпускает с точным iat, который переходит и в
+    токены, обновленные по refresh. Для прочих это exp минус срок жизни.
+    """
+    if 'iat' in token:
+        return token['iat']
+    return token['exp'] - int(token.lifetime.total_seconds())
+
+
+def expires_in(token):
+    return max(int(token['exp'] - time.time()), 1)
+
+
+def revoke_token(token):
+    """Отозвать один токен (выход) до истечения его срока."""
+    jti = token[api_settings.JTI_CLAIM]
+    caches[TOKEN_CACHE].set(revoked_token_key(jti), True, expires_in(token))
+    forget_state(token_state_key(jti))
+
+
+def revoke_user_tokens(user_id):
+    """Отозвать все выпущенные пользователю токены.
+
+    Вызывается при смене пароля и деактивации. Хранится столько, сколько
+    живет самый долгий токен, — дольше старые токены не проходят сами.
+    """
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME,
+                   api_settings.REFRESH_TOKEN_LIFETIME)
+    caches[TOKEN_CACHE].set(revoked_before_key(user_id), time.time(),
+                            int(lifetime.total_seconds()))
+    forget_state(user_state_key(user_id))
+
+
+def user_changed(user_id):
+    """Отметить, что кэшированные копии пользователя устарели."""
+    caches[TOKEN_CACHE].set(
+        user_changed_key(user_id), time.time(),
+        int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()))
+    forget_state(user_state_key(user_id))
+
+
+def check_revoked(token, state):
+    """Бросить AuthenticationFailed, если токен отозван.
+
+    state — результат load_revocation_state.
+    """
+    user_id = token[api_settings.USER_ID_CLAIM]
+    revoked_before = state.get(revoked_before_key(user_id))
+    if (revoked_token_key(token[api_settings.JTI_CLAIM]) in state
+            or (revoked_before is not None
+                and issued_at(token) < revoked_before)):
+        raise AuthenticationFailed(_('Token is revoked'),
+                                   code='token_revoked')
+
+
+def load_revocation_state(token, *extra_keys):
+    """Состояние отзыва токена и extra_keys одним get_many к кэшу.
+
+    Копии записей TOKEN_CACHE по токену и по пользователю берутся из
+    кэша по умолчанию, в TOKEN_CACHE идут только недостающие. Ключи
+    extra_keys читаются из кэша по умолчанию тем же get_many.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    user_id = token[api_settings.USER_ID_CLAIM]
+    sources = {
+        token_state_key(jti): (revoked_token_key(jti),),
+        user_state_key(user_id): (revoked_before_key(user_id),
+                                  user_changed_key(user_id)),
+    }
+    cached = cache.get_many([*sources, *extra_keys])
+    missing = {key: keys for key, keys in sources.items()
+               if key not in cached}
+    if missing:
+        stored = caches[TOKEN_CACHE].get_many(
+            [key for keys in missing.values() for key in keys])
+        loaded = {state_key: {key: stored[key]
+                              for key in keys if key in stored}
+                  for state_key, keys in missing.items()}
+        cache.set_many(loaded, expires_in(token))
+        cached.update(loaded)
+    state = {key: cached[key] for key in extra_keys if key in cached}
+    for key in sources:
+        state.update(cached[key])
+    return state
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса пользователя к базе.
+
+    Проверенный токен сопоставляется с пользователем по jti и хранится
+    в кэше до истечения токена. Отзыв (выход, смена пароля,
+    деактивация) и свежесть кэшированного пользователя проверяются
+    тем же get_many к кэшу, что и сам пользователь.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            jti = validated_token[api_settings.JTI_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+        user_key = token_user_key(jti)
+        changed_key = user_changed_key(user_id)
+        state = load_revocation_state(validated_token, user_key)
+        check_revoked(validated_token, state)
+        cached = state.get(user_key)
+        if cached is not None:
+            cached_at, user = cached
+            if cached_at >= state.get(changed_key, 0):
+                return user
+        loaded_at = time.time()
+        user = super().get_user(validated_token)
+        cache.set(user_key, (loaded_at, user), expires_in(validated_token))
+        return user
@@ -0,0 +1,44 @@
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from posts.cache import FEED_GENERATION, get_generation, make_etag
+
+
+class ConditionalGetMixin:
+    """Ответ 304 Not Modified на GET, если ETag ресурса не изменился.
+
+    ETag считается до основного запроса к базе из дешевых признаков
+    свежести (get_etag_parts), поэтому неизмененный ресурс не читается
+    и не сериализуется заново.
+    """
+
+    def get_etag_parts(self, request):
+        """Признаки свежести ресурса; None отключает проверку."""
+        return (get_generation(FEED_GENERATION),)
+
+    def get_etag(self, request):
+        parts = self.get_etag_parts(request)
+        if parts is None:
+            return None
+        return quote_etag(make_etag(
+            request.accepted_renderer.format, request.user.pk,
+            request.get_full_path(), *parts))
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
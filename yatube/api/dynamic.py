@@ -0,0 +1,109 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_names(value):
+    """Список имен из параметра вида 'a,b,c' без повторов и пробелов."""
+    names = (name.strip() for name in (value or '').split(','))
+    return tuple(dict.fromkeys(name for name in names if name))
+
+
+def ordering_columns(paginator):
+    """Колонки порядка курсорной пагинации: нужны при любых ?fields=."""
+    ordering = getattr(paginator, 'ordering', None) or ()
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    return [name.lstrip('-') for name in ordering]
+
+
+class DynamicFieldsMixin:
+    """Поля сериализатора по ?fields= и раскрытие связей по ?expand=.
+
+    Имена берутся из контекста (fields, expand), который заполняет
+    DynamicFieldsViewMixin. expandable_fields сопоставляет имя поля
+    вложенному сериализатору, который заменяет первичный ключ или slug.
+    """
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.root is not self and self.parent is not self.root:
+            return fields
+        for name in self.context.get('expand') or ():
+            fields[name] = self.expandable_fields[name](read_only=True)
+        selected = self.context.get('fields')
+        if selected:
+            for name in list(fields):
+                if name not in selected:
+                    del fields[name]
+        return fields
+
+
+class DynamicFieldsViewMixin:
+    """Разбор ?fields= и ?expand= и соответствующий им queryset.
+
+    Параметры действуют только на чтение. Неизвестное имя дает 400.
+    Запрос к базе повторяет ответ (sparse_queryset): колонки неотданных
+    полей не читаются, а связанные модели присоединяются, только если
+    они нужны в ответе.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    related_fields = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.requested_fields = self.requested_expand = ()
+        if request.method not in SAFE_METHODS:
+            return
+        serializer_class = self.get_serializer_class()
+        self.requested_fields = self.parse_param(
+            self.fields_query_param, serializer_class.Meta.fields)
+        self.requested_expand = self.parse_param(
+            self.expand_query_param, serializer_class.expandable_fields)
+        if self.requested_fields:
+            self.requested_expand = tuple(
+                name for name in self.requested_expand
+                if name in self.requested_fields)
+
+    def parse_param(self, param, allowed):
+        names = parse_names(self.request.query_params.get(param))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise serializers.ValidationError(
+                {param: [f'Неизвестные поля: {", ".join(unknown)}.']})
+        return names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = getattr(self, 'requested_fields', ())
+        context['expand'] = getattr(self, 'requested_expand', ())
+        return context
+
+    def sparse_queryset(self, queryset):
+        """Queryset только с колонками отдаваемых полей.
+
+        related_fields сопоставляет поле-связь колонкам связанной модели,
+        нужным без раскрытия (None — хватает внешнего ключа). Раскрытая
+        связь читается целиком через select_related.
+        """
+        output = (self.requested_fields
+                  or self.get_serializer_class().Meta.fields)
+        opts = queryset.model._meta
+        model_fields = {field.name for field in opts.concrete_fields}
+        columns = [opts.pk.name, *ordering_columns(self.paginator)]
+        related = []
+        for name in output:
+            if name in self.related_fields:
+                columns.append(name)
+                if name in self.requested_expand:
+                    related.append(name)
+                elif self.related_fields[name]:
+                    related.append(name)
+                    columns.extend(f'{name}__{column}'
+                                   for column in self.related_fields[name])
+            elif name in model_fields:
+                columns.append(name)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
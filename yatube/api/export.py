@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from posts.models import Comment, Post
+from .rows import CommentRowSerializer, PostRowSerializer
+
+# Тип выгрузки: (модель, сериализатор строк, {параметр: lookup}).
+EXPORTS = {
+    'posts': (Post, PostRowSerializer, {
+        'author': 'author__username',
+        'group': 'group__slug',
+    }),
+    'comments': (Comment, CommentRowSerializer, {
+        'author': 'author__username',
+        'group': 'post__group__slug',
+        'post': 'post',
+    }),
+}
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def export_queryset(kind, params):
+    """Строки выгрузки с фильтрами из params, по возрастанию id.
+
+    Фильтры применяются сразу, поэтому некорректное значение вызывает
+    ValueError до начала потоковой отдачи.
+    """
+    model, row_serializer_class, filters = EXPORTS[kind]
+    lookups = {lookup: params[name] for name, lookup in filters.items()
+               if params.get(name)}
+    queryset = model.objects.filter(**lookups).order_by('pk')
+    return row_serializer_class().get_rows(queryset)
+
+
+def ndjson_lines(kind, rows, context=None, chunk_size=None):
+    """Строки NDJSON; iterator() читает их серверным курсором пачками."""
+    row_serializer = EXPORTS[kind][1](context)
+    for row in rows.iterator(
+            chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+        yield _encoder.encode(row_serializer.to_representation(row)) + '\n'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Рендерер для ответов с ошибками при Accept: application/x-ndjson."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (_encoder.encode(data) + '\n').encode()
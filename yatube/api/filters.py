@@ -0,0 +1,12 @@
+from rest_framework.filters import BaseFilterBackend
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по индексированному Post.search_vector."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return queryset.search(query)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import EXPORTS, export_queryset, ndjson_lines
+
+
+class Command(BaseCommand):
+    """Выгрузить посты или комментарии в NDJSON."""
+    help = ('Пишет объекты по одному JSON на строку, читая базу серверным '
+            'курсором: память не растет с размером выгрузки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--author', help='username автора.')
+        parser.add_argument('--group', help='slug группы.')
+        parser.add_argument('--post', help='id поста (для комментариев).')
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+
+    def handle(self, *args, kind, chunk_size, output, **options):
+        try:
+            rows = export_queryset(kind, options)
+        except ValueError as error:
+            raise CommandError(error)
+        lines = ndjson_lines(kind, rows, chunk_size=chunk_size)
+        if output is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8') as export_file:
+            export_file.writelines(lines)
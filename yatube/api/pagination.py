@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import pagination
 from rest_framework.response import Response
 
@@ -13,3 +14,11 @@ class PostPagination(pagination.LimitOffsetPagination):
             'previous': self.get_previous_link(),
             'results': data}
         )
+
+
+class CommentPagination(pagination.CursorPagination):
+    """Курсорный паджинатор комментариев в порядке написания."""
+    ordering = ('created', 'id')
+
+    def get_page_size(self, request):
+        return settings.COMMENTS_PER_PAGE
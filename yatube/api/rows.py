@@ -0,0 +1,97 @@
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from posts.models import Post
+
+ISO_8601 = 'iso-8601'
+
+
+def format_datetime(value):
+    """То же, что DateTimeField.to_representation с настройками DRF."""
+    if not value:
+        return None
+    output_format = api_settings.DATETIME_FORMAT
+    if output_format is None:
+        return value
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    if output_format.lower() != ISO_8601:
+        return value.strftime(output_format)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class RowSerializer:
+    """Сериализатор строк .values() для списков API.
+
+    Отдает то же, что соответствующий ModelSerializer, но без создания
+    моделей и без Field.to_representation на каждое поле каждой строки.
+    columns сопоставляет поле ответа колонке .values(), а метод
+    convert_<поле>, если есть, преобразует значение. fields из
+    контекста (?fields=) оставляет только нужные поля и колонки.
+    """
+    columns = {}
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        selected = self.context.get('fields') or self.columns
+        self.plan = [
+            (name, column, getattr(self, f'convert_{name}', None))
+            for name, column in self.columns.items() if name in selected
+        ]
+
+    def get_rows(self, queryset, *extra_columns):
+        columns = [column for _, column, _ in self.plan]
+        return queryset.values(*dict.fromkeys(columns + list(extra_columns)))
+
+    def to_representation(self, row):
+        return {name: convert(row[column]) if convert else row[column]
+                for name, column, convert in self.plan}
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class PostRowSerializer(RowSerializer):
+    """Строки постов в формате PostSerializer."""
+    columns = {
+        'id': 'id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+        'group': 'group',
+        'comment_count': 'comment_count',
+    }
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.storage = Post._meta.get_field('image').storage
+        self.request = self.context.get('request')
+
+    def convert_pub_date(self, value):
+        return format_datetime(value)
+
+    def convert_image(self, name):
+        if not name:
+            return None
+        url = self.storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+
+class CommentRowSerializer(RowSerializer):
+    """Строки комментариев в формате CommentSerializer."""
+    columns = {
+        'id': 'id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+        'post': 'post',
+    }
+
+    def convert_created(self, value):
+        return format_datetime(value)
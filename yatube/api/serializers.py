@@ -1,25 +1,119 @@
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 
+from djoser.serializers import UserSerializer as BaseUserSerializer
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueTogetherValidator
-
-from posts.models import Comment, Follow, Group, Post
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from posts.images import ImageIngestError, ingest_image
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+from posts.signals import posts_bulk_created
+from .authentication import check_revoked, load_revocation_state
+from .dynamic import DynamicFieldsMixin
 
 User = get_user_model()
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PK-поле, которое сначала ищет объект среди загруженных заранее."""
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.field_name)
+        if prefetched and str(data) in prefetched:
+            return prefetched[str(data)]
+        return super().to_internal_value(data)
+
+
+class BulkPostListSerializer(serializers.ListSerializer):
+    """Создание списка постов одним INSERT в одной транзакции."""
+
+    def to_internal_value(self, data):
+        limit = settings.BULK_POSTS_MAX
+        if isinstance(data, list) and len(data) > limit:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Не больше {limit} постов за один запрос.']
+            })
+        if isinstance(data, list):
+            self._prefetch_related(data)
+        return super().to_internal_value(data)
+
+    def _prefetch_related(self, data):
+        """Загрузить связанные объекты всей пачки одним запросом на поле."""
+        prefetched = {}
+        for name, field in self.child.fields.items():
+            if (field.read_only or not isinstance(
+                    field, PrefetchedPrimaryKeyRelatedField)):
+                continue
+            pks = {str(item.get(name)) for item in data
+                   if isinstance(item, dict)}
+            objects = field.get_queryset().in_bulk(
+                [pk for pk in pks if pk.isdigit()])
+            prefetched[name] = {str(pk): obj for pk, obj in objects.items()}
+        self._context['prefetched'] = prefetched
+
+    def create(self, validated_data):
+        posts = [Post(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+            posts_bulk_created.send(sender=Post, posts=posts)
+        return posts
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели Group."""
+
+    class Meta:
+        fields = ('id', 'title', 'slug', 'description')
+        model = Group
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    """Автор поста или комментария для ?expand=author."""
+
+    class Meta:
+        fields = ('id', 'username', 'first_name', 'last_name')
+        model = User
+
+
+class PostSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Post."""
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    expandable_fields = {'author': AuthorSerializer,
+                         'group': GroupSerializer}
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
-        fields = ('id', 'author', 'text', 'pub_date', 'image', 'group')
+        fields = ('id', 'author', 'text', 'pub_date', 'image', 'group',
+                  'comment_count')
         model = Post
+        read_only_fields = ('comment_count',)
+        list_serializer_class = BulkPostListSerializer
 
+    def validate_image(self, value):
+        if not isinstance(value, UploadedFile):
+            return value
+        try:
+            return ingest_image(value)
+        except ImageIngestError:
+            raise serializers.ValidationError(
+                'Не удалось обработать изображение')
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Comment."""
+    expandable_fields = {'author': AuthorSerializer}
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
@@ -30,14 +124,6 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('post',)
 
 
-class GroupSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Group."""
-
-    class Meta:
-        fields = ('id', 'title', 'slug', 'description')
-        model = Group
-
-
 class FollowerSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Following."""
     user = serializers.SlugRelatedField(
@@ -46,6 +132,7 @@ class FollowerSerializer(serializers.ModelSerializer):
         default=serializers.CurrentUserDefault()
     )
     following = serializers.SlugRelatedField(
+        source='author',
         read_only=False, slug_field='username',
         queryset=User.objects.all()
     )
@@ -67,3 +154,57 @@ class FollowerSerializer(serializers.ModelSerializer):
         if user.username == str(value):
             raise serializers.ValidationError('Нельзя подписаться на себя')
         return value
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    """Сериализатор счетчиков профиля."""
+
+    class Meta:
+        fields = ('posts_count', 'followers_count', 'following_count')
+        model = AuthorStats
+
+
+class UserSerializer(BaseUserSerializer):
+    """Пользователь djoser со счетчиками профиля."""
+    stats = AuthorStatsSerializer(read_only=True)
+
+    class Meta(BaseUserSerializer.Meta):
+        fields = BaseUserSerializer.Meta.fields + ('stats',)
+
+
+class IssuedAtTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Выдача токенов с точным временем выпуска для проверки отзыва."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['iat'] = time.time()
+        return token
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление токена, которое не принимает отозванный refresh."""
+
+    def validate(self, attrs):
+        try:
+            refresh = RefreshToken(attrs['refresh'])
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        check_revoked(refresh, load_revocation_state(refresh))
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Необязательный refresh-токен, который отзывается вместе с доступом."""
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            refresh = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(error.args[0])
+        user = self.context['request'].user
+        if refresh.get(jwt_settings.USER_ID_CLAIM) != getattr(
+                user, jwt_settings.USER_ID_FIELD):
+            raise serializers.ValidationError('Чужой токен.')
+        return refresh
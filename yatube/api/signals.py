@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import revoke_user_tokens, user_changed
+
+User = get_user_model()
+
+REVOKING_FIELDS = ('password', 'is_active')
+# Поля, изменение которых не делает кэшированного пользователя устаревшим.
+IGNORED_FIELDS = {'last_login'}
+
+
+@receiver(pre_save, sender=User)
+def user_credentials_changed(sender, instance, raw, update_fields,
+                             **kwargs):
+    """Отозвать токены пользователя при смене пароля или деактивации."""
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(REVOKING_FIELDS) & set(
+            update_fields):
+        return
+    previous = (User.objects.filter(pk=instance.pk)
+                .values(*REVOKING_FIELDS).first())
+    if previous and any(previous[name] != getattr(instance, name)
+                        for name in REVOKING_FIELDS):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw, update_fields, **kwargs):
+    """Кэшированные для JWT копии пользователя больше не годятся.
+
+    Вход в сессию сохраняет только last_login — копии это не задевает.
+    """
+    if created or raw:
+        return
+    if update_fields is not None and set(update_fields) <= IGNORED_FIELDS:
+        return
+    user_changed(instance.pk)
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts.models import User
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    client_class = APIClient
+    USERNAME = 'reader'
+    PASSWORD = 'old-password-123'
+    URL = '/api/v1/follow/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username=self.USERNAME, password=self.PASSWORD)
+
+    def login(self, password=PASSWORD):
+        response = self.client.post('/api/v1/jwt/create/', {
+            'username': self.USERNAME, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get(self.URL)
+
+    def user_queries(self, access, table='auth_user'):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get(access).status_code, 200)
+        return [query['sql'] for query in context.captured_queries
+                if f'FROM "{table}"' in query['sql']]
+
+    def test_user_is_cached_per_token(self):
+        """Пользователь загружается из базы только для первого запроса."""
+        access = self.login()['access']
+        self.assertEqual(len(self.user_queries(access)), 1)
+        self.assertEqual(self.user_queries(access), [])
+
+    def test_revocation_state_is_cached(self):
+        """Таблица отзывов читается только для первого запроса с токеном."""
+        access = self.login()['access']
+        self.assertEqual(len(self.user_queries(access, 'token_cache')), 1)
+        self.assertEqual(self.user_queries(access, 'token_cache'), [])
+
+    def test_changed_user_is_reloaded(self):
+        """После сохранения пользователя кэшированная копия не берется."""
+        access = self.login()['access']
+        self.user_queries(access)
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        self.assertEqual(len(self.user_queries(access)), 1)
+
+    def test_logout_revokes_tokens(self):
+        """Выход отзывает токен доступа и переданный refresh."""
+        tokens = self.login()
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+        response = self.client.post(
+            '/api/v1/jwt/logout/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+        self.client.credentials()
+        response = self.client.post(
+            '/api/v1/jwt/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+    def test_revocation_survives_default_cache_loss(self):
+        """Отзыв хранится отдельно от вытесняемого кэша по умолчанию."""
+        tokens = self.login()
+        self.get(tokens['access'])
+        response = self.client.post(
+            '/api/v1/jwt/logout/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 204)
+        cache.clear()
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+
+    def test_password_change_revokes_tokens(self):
+        """Смена пароля отзывает все выпущенные ранее токены."""
+        tokens = self.login()
+        self.get(tokens['access'])
+        self.user.set_password('new-password-123')
+        self.user.save()
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+        self.client.credentials()
+        response = self.client.post(
+            '/api/v1/jwt/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+        access = self.login('new-password-123')['access']
+        self.assertEqual(self.get(access).status_code, 200)
+
+    def test_deactivation_revokes_tokens(self):
+        """Деактивированный пользователь теряет доступ сразу."""
+        access = self.login()['access']
+        self.get(access)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(access).status_code, 401)
+
+    def test_last_login_does_not_revoke(self):
+        """Сохранение last_login не отзывает токены и не сбрасывает кэш."""
+        access = self.login()['access']
+        self.user_queries(access)
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.user_queries(access), [])
@@ -0,0 +1,58 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts.models import Group, Post, User
+
+
+class PostBatchTest(TestCase):
+    client_class = APIClient
+    URL = '/api/v1/posts/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Тест', slug='test', description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=author,
+                                group=group)
+            for number in range(3)
+        ]
+        cls.missing_id = cls.posts[-1].pk + 100
+
+    def get(self, ids, **params):
+        return self.client.get(self.URL, {'ids': ids, **params})
+
+    def test_caller_order_and_missing(self):
+        """Посты в порядке запроса без повторов, ненайденные отдельно."""
+        first, second, third = (post.pk for post in self.posts)
+        ids = f'{third},{self.missing_id},{first},{third}'
+        with self.assertNumQueries(1):
+            response = self.get(ids)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [third, first])
+        self.assertEqual(data['missing'], [self.missing_id])
+        self.assertEqual(
+            data['results'][1],
+            self.client.get(f'/api/v1/posts/{first}/').json())
+
+    def test_fields_and_expand(self):
+        """Пачка поддерживает ?fields= и ?expand=."""
+        post = self.posts[0]
+        with self.assertNumQueries(1):
+            response = self.get(str(post.pk), fields='id,group',
+                                expand='group')
+        self.assertEqual(response.json()['results'], [{
+            'id': post.pk,
+            'group': {'id': post.group_id, 'title': 'Тест',
+                      'slug': 'test', 'description': 'Описание'},
+        }])
+
+    @override_settings(BATCH_POSTS_MAX=2)
+    def test_invalid_ids(self):
+        """Пустой, нечисловой или слишком длинный список дает 400."""
+        for ids in ('', 'a,1', '-1', '99999999999', '1,2,3'):
+            with self.subTest(ids=ids):
+                self.assertEqual(self.get(ids).status_code, 400)
@@ -0,0 +1,81 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts.models import Follow, Group, Post, TimelineEntry, User
+
+
+class BulkPostCreateTest(TestCase):
+    client_class = APIClient
+    BULK_URL = '/api/v1/posts/bulk/'
+    SAMPLE_TEXT = 'test'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title=cls.SAMPLE_TEXT,
+            description=cls.SAMPLE_TEXT,
+            slug=cls.SAMPLE_TEXT,
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.author)
+
+    def payload(self, count):
+        return [{'text': f'{self.SAMPLE_TEXT} {number}',
+                 'group': self.group.pk}
+                for number in range(count)]
+
+    def test_bulk_create(self):
+        """Пачка постов создается и раскладывается по лентам."""
+        response = self.client.post(
+            self.BULK_URL, self.payload(3), format='json')
+        self.assertEqual(response.status_code, 201)
+        created = [item['id'] for item in response.json()]
+        self.assertEqual(len(created), 3)
+        self.assertEqual(
+            Post.objects.filter(pk__in=created, author=self.author).count(),
+            3)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual(
+            Post.objects.search(self.SAMPLE_TEXT).count(), 3)
+
+    def test_query_count_does_not_grow(self):
+        """Число запросов не зависит от размера пачки."""
+        counts = []
+        for size in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(
+                    self.BULK_URL, self.payload(size), format='json')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_invalid_item_rejects_batch(self):
+        """Ошибка в одном посте отклоняет всю пачку с ошибками по позициям."""
+        payload = self.payload(2) + [{'text': ''}]
+        response = self.client.post(self.BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[:2], [{}, {}])
+        self.assertIn('text', errors[2])
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(BULK_POSTS_MAX=2)
+    def test_batch_size_limit(self):
+        """Слишком большая пачка отклоняется целиком."""
+        response = self.client.post(
+            self.BULK_URL, self.payload(3), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+
+    def test_anonymous_cannot_bulk_create(self):
+        """Аноним не может создавать посты."""
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            self.BULK_URL, self.payload(1), format='json')
+        self.assertEqual(response.status_code, 401)
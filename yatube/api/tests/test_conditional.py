@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    client_class = APIClient
+    SAMPLE_TEXT = 'test'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Group.objects.create(
+            title=cls.SAMPLE_TEXT,
+            description=cls.SAMPLE_TEXT,
+            slug=cls.SAMPLE_TEXT,
+        )
+        cls.post = Post.objects.create(
+            text=cls.SAMPLE_TEXT, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response['ETag']
+
+    def test_unchanged_resource_not_modified(self):
+        """Неизмененный список отдается как 304 без запросов к базе."""
+        urls = ('/api/v1/posts/', '/api/v1/groups/',
+                f'/api/v1/posts/{self.post.pk}/comments/')
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.get_etag(url)
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_post_detail_follows_version(self):
+        """ETag поста меняется вместе с его версией."""
+        url = f'/api/v1/posts/{self.post.pk}/'
+        etag = self.get_etag(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(
+            post=self.post, author=self.author, text=self.SAMPLE_TEXT)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_format(self):
+        """JSON и Browsable API получают разные ETag."""
+        url = '/api/v1/posts/'
+        self.assertNotEqual(self.get_etag(url),
+                            self.get_etag(url + '?format=api'))
+
+    def test_etags_are_per_resource(self):
+        """Комментарий к другому посту не меняет ETag групп и комментариев."""
+        other = Post.objects.create(text=self.SAMPLE_TEXT, author=self.author)
+        urls = ('/api/v1/groups/', f'/api/v1/posts/{self.post.pk}/comments/')
+        etags = {url: self.get_etag(url) for url in urls}
+        Comment.objects.create(
+            post=other, author=self.author, text=self.SAMPLE_TEXT)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_comment_edit_refreshes_comment_list(self):
+        """Правка комментария меняет ETag только списка комментариев."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text=self.SAMPLE_TEXT)
+        comments_url = f'/api/v1/posts/{self.post.pk}/comments/'
+        posts_url = '/api/v1/posts/'
+        comments_etag = self.get_etag(comments_url)
+        posts_etag = self.get_etag(posts_url)
+        comment.text = 'edited'
+        comment.save()
+        response = self.client.get(
+            comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.get(posts_url, HTTP_IF_NONE_MATCH=posts_etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_post_delete_refreshes_comment_list(self):
+        """После удаления поста старый ETag его комментариев не подходит."""
+        post = Post.objects.create(text=self.SAMPLE_TEXT, author=self.author)
+        Comment.objects.create(
+            post=post, author=self.author, text=self.SAMPLE_TEXT)
+        url = f'/api/v1/posts/{post.pk}/comments/'
+        etag = self.get_etag(url)
+        post.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
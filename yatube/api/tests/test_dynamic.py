@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Group, Post, User
+
+
+class DynamicFieldsTest(TestCase):
+    client_class = APIClient
+    URL = '/api/v1/posts/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев')
+        cls.group = Group.objects.create(
+            title='Тест', slug='test', description='Описание')
+        cls.post = Post.objects.create(
+            text='С группой', author=cls.author, group=cls.group)
+        Post.objects.create(text='Без группы', author=cls.author)
+        for _ in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.sql = ' '.join(query['sql'] for query in context.captured_queries)
+        return response.json()
+
+    def test_sparse_fields(self):
+        """?fields= оставляет только перечисленные поля и колонки."""
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(
+                    API_FAST_LIST=fast):
+                data = self.get(self.URL, fields='id,group')
+                self.assertEqual(data, [
+                    {'id': self.post.pk + 1, 'group': None},
+                    {'id': self.post.pk, 'group': self.group.pk},
+                ])
+                self.assertNotIn('"post"."text"', self.sql)
+                self.assertNotIn('auth_user', self.sql)
+
+    def test_expand(self):
+        """?expand= раскрывает автора и группу одним запросом."""
+        with self.assertNumQueries(1):
+            data = self.get(self.URL, expand='group,author')
+        self.assertEqual(data[0]['group'], None)
+        self.assertEqual(data[1]['group'], {
+            'id': self.group.pk, 'title': 'Тест', 'slug': 'test',
+            'description': 'Описание'})
+        self.assertEqual(data[1]['author'], {
+            'id': self.author.pk, 'username': 'author',
+            'first_name': 'Лев', 'last_name': ''})
+        self.assertNotIn('search_vector', self.sql)
+
+    def test_expand_with_fields(self):
+        """Раскрытие действует только для отдаваемых полей."""
+        data = self.get(f'{self.URL}{self.post.pk}/',
+                        fields='text,group', expand='group,author')
+        self.assertEqual(data, {
+            'text': 'С группой',
+            'group': {'id': self.group.pk, 'title': 'Тест', 'slug': 'test',
+                      'description': 'Описание'},
+        })
+
+    def test_unknown_field(self):
+        """Неизвестное поле в параметрах дает 400."""
+        for params in ({'fields': 'id,password'}, {'expand': 'text'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.URL, params)
+                self.assertEqual(response.status_code, 400)
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_comment_cursor_with_fields(self):
+        """Курсор комментариев работает и без полей порядка в ответе."""
+        url = f'/api/v1/posts/{self.post.pk}/comments/'
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(
+                    API_FAST_LIST=fast):
+                first = self.get(url, fields='text')
+                self.assertEqual(first['results'],
+                                 [{'text': 'Комментарий'}] * 2)
+                second = self.client.get(first['next']).json()
+                self.assertEqual(len(second['results']), 1)
+
+    def test_fields_ignored_on_write(self):
+        """При создании поста ?fields= не сужает ввод и ответ."""
+        self.client.force_authenticate(self.author)
+        response = self.client.post(
+            f'{self.URL}?fields=id', {'text': 'Новый'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['text'], 'Новый')
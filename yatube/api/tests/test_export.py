@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Group, Post, User
+
+
+class ExportTest(TestCase):
+    client_class = APIClient
+    POSTS_URL = '/api/v1/export/posts/'
+    COMMENTS_URL = '/api/v1/export/comments/'
+    SAMPLE_TEXT = 'test'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title=cls.SAMPLE_TEXT,
+            description=cls.SAMPLE_TEXT,
+            slug=cls.SAMPLE_TEXT,
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'{cls.SAMPLE_TEXT} {number}', author=cls.author,
+                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Post.objects.create(text=cls.SAMPLE_TEXT, author=cls.other)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.other, text=cls.SAMPLE_TEXT)
+
+    def setUp(self):
+        self.client.force_authenticate(self.other)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_posts_by_author(self):
+        """Выгрузка постов автора совпадает с представлением в API."""
+        rows = self.read(self.client.get(
+            self.POSTS_URL, {'author': self.author.username}))
+        expected = [self.client.get(f'/api/v1/posts/{post.pk}/').json()
+                    for post in self.posts]
+        self.assertEqual(rows, expected)
+
+    def test_export_filters(self):
+        """Фильтры по группе и посту ограничивают выгрузку."""
+        cases = {
+            (self.POSTS_URL, 'group', self.group.slug): 2,
+            (self.COMMENTS_URL, 'post', self.posts[0].pk): 1,
+            (self.COMMENTS_URL, 'author', self.author.username): 0,
+        }
+        for (url, name, value), count in cases.items():
+            with self.subTest(url=url, name=name):
+                rows = self.read(self.client.get(url, {name: value}))
+                self.assertEqual(len(rows), count)
+
+    def test_invalid_filter(self):
+        """Некорректный фильтр дает 400 до начала выгрузки."""
+        response = self.client.get(self.COMMENTS_URL, {'post': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_anonymous_cannot_export(self):
+        """Выгрузка доступна только авторизованным пользователям."""
+        self.client.force_authenticate(None)
+        response = self.client.get(self.POSTS_URL)
+        self.assertEqual(response.status_code, 401)
+
+    def test_export_command(self):
+        """Команда выгружает посты автора пачками по возрастанию id."""
+        out = StringIO()
+        call_command('export_ndjson', 'posts', '--chunk-size', '2',
+                     '--author', self.author.username, stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [post.pk for post in self.posts])
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.testing import QueryBudgetMixin
+from posts.models import Comment, Group, Post, User
+
+
+class ApiQueryBudgetTest(QueryBudgetMixin, TestCase):
+    client_class = APIClient
+    SAMPLE_TEXT = 'test'
+    POSTS_COUNT = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(
+            title=cls.SAMPLE_TEXT,
+            description=cls.SAMPLE_TEXT,
+            slug=cls.SAMPLE_TEXT,
+        )
+        for number in range(cls.POSTS_COUNT):
+            author = User.objects.create_user(username=f'author{number}')
+            cls.post = Post.objects.create(
+                text=cls.SAMPLE_TEXT, author=author, group=group)
+            Comment.objects.create(
+                post=Post.objects.first(), author=author,
+                text=cls.SAMPLE_TEXT)
+
+    def test_endpoints_query_budget(self):
+        """Число запросов API не растет с числом объектов."""
+        post_id = Post.objects.first().pk
+        url_budget = {
+            '/api/v1/posts/': 1,
+            '/api/v1/posts/?limit=5&offset=5': 2,
+            # Плюс запрос версии поста для ETag.
+            f'/api/v1/posts/{self.post.pk}/': 2,
+            f'/api/v1/posts/{post_id}/comments/': 1,
+            '/api/v1/groups/': 1,
+        }
+        for url, budget in url_budget.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(url, budget)
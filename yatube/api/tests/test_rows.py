@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FastListTest(TestCase):
+    client_class = APIClient
+    SAMPLE_TEXT = 'test'
+    GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+           b'\x01\x00\x80\x00\x00\x00\x00\x00'
+           b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+           b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+           b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+           b'\x0A\x00\x3B')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title=cls.SAMPLE_TEXT,
+            description=cls.SAMPLE_TEXT,
+            slug=cls.SAMPLE_TEXT,
+        )
+        cls.post = Post.objects.create(
+            text=cls.SAMPLE_TEXT, author=author, group=group,
+            image=SimpleUploadedFile('small.gif', cls.GIF, 'image/gif'))
+        Post.objects.create(text='Котики любят молоко', author=author)
+        for _ in range(2):
+            Comment.objects.create(
+                post=cls.post, author=author, text=cls.SAMPLE_TEXT)
+
+    def test_output_is_identical(self):
+        """Быстрый список отдает те же байты, что и ModelSerializer."""
+        urls = (
+            '/api/v1/posts/',
+            '/api/v1/posts/?limit=1&offset=1',
+            '/api/v1/posts/?search=котик',
+            f'/api/v1/posts/{self.post.pk}/comments/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.client.get(url)
+                with override_settings(API_FAST_LIST=False):
+                    full = self.client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, full.content)
+
+    def test_image_url_is_absolute(self):
+        """Картинка отдается абсолютным URL, как у ImageField."""
+        response = self.client.get('/api/v1/posts/')
+        self.assertEqual(
+            response.json()[1]['image'],
+            f'http://testserver/media/{self.post.image.name}')
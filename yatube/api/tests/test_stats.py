@@ -0,0 +1,38 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import AuthorStats, Post, User
+
+
+class AuthorStatsApiTest(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def test_follow_and_post_update_stats(self):
+        """Подписка и пост через API обновляют счетчики профилей."""
+        response = self.client.post(
+            '/api/v1/follow/', {'following': self.author.username})
+        self.assertEqual(response.status_code, 201)
+        self.client.post('/api/v1/posts/', {'text': 'test'})
+        reader = AuthorStats.objects.get(author=self.reader)
+        author = AuthorStats.objects.get(author=self.author)
+        self.assertEqual(reader.following_count, 1)
+        self.assertEqual(reader.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+
+    def test_user_has_stats_field(self):
+        """Пользователь в API отдается вместе со счетчиками."""
+        Post.objects.create(text='test', author=self.reader)
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.json()['stats'], {
+            'posts_count': 1,
+            'followers_count': 0,
+            'following_count': 0,
+        })
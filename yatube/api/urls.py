@@ -1,7 +1,9 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework import routers
 
-from .views import CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet
+from .views import (CommentViewSet, ExportView, FollowViewSet, GroupViewSet,
+                    IssuedAtTokenObtainPairView, LogoutView, PostViewSet,
+                    RevocableTokenRefreshView)
 
 router_v1 = routers.DefaultRouter()
 router_v1.register(r'posts', PostViewSet, basename='posts')
@@ -12,7 +14,14 @@ router_v1.register(
     basename='comments')
 router_v1.register(r'follow', FollowViewSet, basename='follow')
 urlpatterns = [
+    re_path(r'^v1/export/(?P<kind>posts|comments)/$', ExportView.as_view(),
+            name='export'),
     path('v1/', include(router_v1.urls)),
+    path('v1/jwt/create/', IssuedAtTokenObtainPairView.as_view(),
+         name='jwt-create'),
+    path('v1/jwt/refresh/', RevocableTokenRefreshView.as_view(),
+         name='jwt-refresh'),
+    path('v1/jwt/logout/', LogoutView.as_view(), name='jwt-logout'),
     path('v1/', include('djoser.urls')),
     path('v1/', include('djoser.urls.jwt')),
 
@@ -1,14 +1,38 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-from rest_framework import filters, mixins
+from rest_framework import filters, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import (GenericViewSet, ModelViewSet,
                                      ReadOnlyModelViewSet)
+from rest_framework_simplejwt.views import (TokenObtainPairView,
+                                            TokenRefreshView)
 
+from posts.cache import GROUPS_GENERATION, comments_generation, get_generation
+from posts.loaders import get_post_detail
 from posts.models import Comment, Follow, Group, Post
-from .pagination import PostPagination
+from .authentication import revoke_token
+from .conditional import ConditionalGetMixin
+from .dynamic import DynamicFieldsViewMixin, ordering_columns, parse_names
+from .export import NDJSONRenderer, export_queryset, ndjson_lines
+from .filters import FullTextSearchFilter
+from .pagination import CommentPagination, PostPagination
 from .permissions import AuthenticatedOnly, OwnerOrReadOnly
+from .rows import CommentRowSerializer, PostRowSerializer
 from .serializers import (CommentSerializer, FollowerSerializer,
-                          GroupSerializer, PostSerializer)
+                          GroupSerializer, IssuedAtTokenObtainPairSerializer,
+                          LogoutSerializer, PostSerializer,
+                          RevocableTokenRefreshSerializer)
+
+
+# Наибольшее значение AutoField (integer в PostgreSQL).
+MAX_ID = 2 ** 31 - 1
 
 
 class ListCreateViewSet(mixins.ListModelMixin,
@@ -19,40 +43,162 @@ class ListCreateViewSet(mixins.ListModelMixin,
     pass
 
 
-class PostViewSet(ModelViewSet):
+class FastListMixin:
+    """Список через .values() и RowSerializer вместо ModelSerializer.
+
+    Включается настройкой API_FAST_LIST; ответ совпадает побайтно.
+    Раскрытые связи (?expand=) строки не умеют, такой список отдает
+    обычный сериализатор.
+    """
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if (not settings.API_FAST_LIST or self.row_serializer_class is None
+                or getattr(self, 'requested_expand', ())):
+            return super().list(request, *args, **kwargs)
+        row_serializer = self.row_serializer_class(
+            context=self.get_serializer_context())
+        rows = row_serializer.get_rows(
+            self.filter_queryset(self.get_queryset()),
+            *ordering_columns(self.paginator))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(rows))
+
+
+class PostViewSet(ConditionalGetMixin, DynamicFieldsViewMixin,
+                  FastListMixin, ModelViewSet):
     """View-set для постов."""
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related('author')
     serializer_class = PostSerializer
+    row_serializer_class = PostRowSerializer
     pagination_class = PostPagination
     permission_classes = (OwnerOrReadOnly,)
+    filter_backends = (FullTextSearchFilter,)
+    related_fields = {'author': ('username',), 'group': None}
+
+    def get_queryset(self):
+        if self.action in ('list', 'batch'):
+            return self.sparse_queryset(Post.objects.all())
+        return super().get_queryset()
+
+    def get_etag_parts(self, request):
+        if self.action != 'retrieve':
+            return super().get_etag_parts(request)
+        # Версия растет при правке поста и изменении комментариев.
+        version = (Post.objects
+                   .filter(pk=self.kwargs['pk'])
+                   .values_list('version', flat=True)
+                   .first())
+        return None if version is None else (version,)
+
+    def get_object(self):
+        if self.action != 'retrieve':
+            return super().get_object()
+        try:
+            post = get_post_detail(self.kwargs['pk'])
+        except (Post.DoesNotExist, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, post)
+        return post
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Создать список постов одним запросом.
+
+        Пачка сохраняется целиком или не сохраняется вовсе: при ошибке
+        в ответе список ошибок по порядку постов ({} для корректных).
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(author=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False)
+    def batch(self, request):
+        """Посты по списку id (?ids=3,1,2) одним запросом.
+
+        Посты отдаются в порядке запроса без повторов, ненайденные id
+        перечисляются в missing. Поддерживает ?fields= и ?expand=.
+        """
+        ids = self.parse_ids(request.query_params.get('ids'))
+        posts = self.get_queryset().filter(pk__in=ids).order_by()
+        by_id = {post.pk: post for post in posts}
+        serializer = self.get_serializer(
+            [by_id[pk] for pk in ids if pk in by_id], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in by_id],
+        })
+
+    @staticmethod
+    def parse_ids(value):
+        limit = settings.BATCH_POSTS_MAX
+        try:
+            ids = tuple(dict.fromkeys(int(pk) for pk in parse_names(value)))
+        except ValueError:
+            ids = None
+        if ids is None or not all(0 < pk <= MAX_ID for pk in ids):
+            raise ValidationError(
+                {'ids': ['Ожидаются положительные целые id через запятую.']})
+        if not ids:
+            raise ValidationError({'ids': ['Укажите хотя бы один id.']})
+        if len(ids) > limit:
+            raise ValidationError(
+                {'ids': [f'Не больше {limit} id за один запрос.']})
+        return ids
 
 
 # Не получиться наследоваться от ListCreateViewSet,
 # так как по условию нельзя создать группу через api
-class GroupViewSet(ReadOnlyModelViewSet):
+class GroupViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     """View-set для групп."""
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
 
+    def get_etag_parts(self, request):
+        return (get_generation(GROUPS_GENERATION),)
 
-class CommentViewSet(ModelViewSet):
+
+class CommentViewSet(ConditionalGetMixin, DynamicFieldsViewMixin,
+                     FastListMixin, ModelViewSet):
     """View-set для комментариев."""
     serializer_class = CommentSerializer
+    row_serializer_class = CommentRowSerializer
+    pagination_class = CommentPagination
     permission_classes = (OwnerOrReadOnly,)
+    related_fields = {'author': ('username',), 'post': None}
+
+    def get_etag_parts(self, request):
+        return (get_generation(comments_generation(self.kwargs['post_id'])),)
 
     def get_queryset(self):
         post_id = self.kwargs['post_id']
-        return Comment.objects.filter(post=post_id)
+        if self.action == 'list':
+            return self.sparse_queryset(
+                Comment.objects.filter(post=post_id))
+        return Comment.objects.select_related('author').filter(post=post_id)
 
     def perform_create(self, serializer):
         post = get_object_or_404(Post, pk=self.kwargs['post_id'])
-        serializer.save(
-            author=self.request.user,
-            post=post
-        )
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                post=post
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
 
 class FollowViewSet(ListCreateViewSet):
@@ -61,14 +207,60 @@ class FollowViewSet(ListCreateViewSet):
     permission_classes = (AuthenticatedOnly,)
     filter_backends = (filters.SearchFilter,)
 
-    search_fields = ('user__username', 'following__username')
+    search_fields = ('user__username', 'author__username')
 
     def get_queryset(self):
-        return Follow.objects.filter(
+        return Follow.objects.select_related('user', 'author').filter(
             user=self.request.user
         )
 
     def perform_create(self, serializer):
-        serializer.save(
-            user=self.request.user
-        )
+        with transaction.atomic():
+            serializer.save(
+                user=self.request.user
+            )
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка постов или комментариев в NDJSON.
+
+    Фильтры: author (username), group (slug), для комментариев еще post.
+    """
+    permission_classes = (AuthenticatedOnly,)
+    renderer_classes = (JSONRenderer, NDJSONRenderer)
+
+    def get(self, request, kind):
+        try:
+            rows = export_queryset(kind, request.query_params)
+        except ValueError:
+            raise ValidationError('Некорректное значение фильтра.')
+        response = StreamingHttpResponse(
+            ndjson_lines(kind, rows, self.get_renderer_context()),
+            content_type=NDJSONRenderer.media_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.ndjson"')
+        return response
+
+
+class IssuedAtTokenObtainPairView(TokenObtainPairView):
+    """jwt/create/ с точным iat в выданных токенах."""
+    serializer_class = IssuedAtTokenObtainPairSerializer
+
+
+class RevocableTokenRefreshView(TokenRefreshView):
+    """jwt/refresh/, который не выдает токены по отозванному refresh."""
+    serializer_class = RevocableTokenRefreshSerializer
+
+
+class LogoutView(APIView):
+    """Выход: отзыв текущего токена доступа и, если передан, refresh."""
+    permission_classes = (AuthenticatedOnly,)
+
+    def post(self, request):
+        serializer = LogoutSerializer(
+            data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        revoke_token(request.auth)
+        if 'refresh' in serializer.validated_data:
+            revoke_token(serializer.validated_data['refresh'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
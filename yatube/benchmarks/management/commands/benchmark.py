@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import build_report, load_report, measure, save_report
+from benchmarks.scenarios import SCENARIOS
+from posts.models import Comment, Follow, Group, Post, User
+
+COLUMNS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', 'rps')
+
+
+class Command(BaseCommand):
+    """Прогнать сценарии нагрузочного теста и сохранить результаты."""
+    help = ('Измеряет p50/p95/p99, число запросов к БД и RPS для страниц '
+            'и API на текущей базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', nargs='+', default=['views', 'api'],
+            choices=sorted(SCENARIOS))
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument('--output', help='Файл для отчета в JSON.')
+        parser.add_argument(
+            '--compare', help='Отчет предыдущего прогона для сравнения.')
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError(
+                'База пуста, сначала выполните seed_benchmark_data.')
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG=True: Django хранит все SQL-запросы, '
+                'результаты будут хуже боевых.')
+        results = []
+        for name in options['scenario']:
+            for label, call in SCENARIOS[name]():
+                if options['cold']:
+                    call = self._cold(call)
+                result = measure(label, call, options['requests'],
+                                 options['warmup'])
+                results.append(result)
+                self.stdout.write(self._format(result))
+        report = build_report(results, dataset={
+            'users': User.objects.count(),
+            'groups': Group.objects.count(),
+            'posts': Post.objects.count(),
+            'comments': Comment.objects.count(),
+            'follows': Follow.objects.count(),
+        })
+        if options['output']:
+            save_report(report, options['output'])
+        if options['compare']:
+            self._compare(load_report(options['compare']), report)
+
+    @staticmethod
+    def _cold(call):
+        def cold_call():
+            cache.clear()
+            call()
+        return cold_call
+
+    @staticmethod
+    def _format(result):
+        values = ' '.join(f'{column}={result[column]}' for column in COLUMNS)
+        return f'{result["name"]:<20} {values}'
+
+    def _compare(self, previous, current):
+        before = {result['name']: result for result in previous['results']}
+        self.stdout.write('Изменение относительно прошлого прогона:')
+        for result in current['results']:
+            old = before.get(result['name'])
+            if old is None:
+                continue
+            changes = ' '.join(
+                f'{column}={result[column] - old[column]:+.2f}'
+                for column in COLUMNS)
+            self.stdout.write(f'{result["name"]:<20} {changes}')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.seed import seed
+
+
+class Command(BaseCommand):
+    """Заполнить базу синтетическими данными для нагрузочных тестов."""
+    help = 'Создает пользователей, группы, посты, комментарии и подписки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+        )
+        for name, number in created.items():
+            self.stdout.write(f'{name}: {number}')
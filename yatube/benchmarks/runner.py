@@ -0,0 +1,64 @@
+import json
+import math
+import platform
+import time
+
+import django
+from django.utils import timezone
+
+from core.querycount import QueryRecorder
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[rank]
+
+
+def measure(name, func, requests=100, warmup=5):
+    """Выполнить func requests раз и вернуть задержки, запросы и RPS."""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        recorder = QueryRecorder()
+        request_started = time.perf_counter()
+        with recorder.record():
+            func()
+        latencies.append((time.perf_counter() - request_started) * 1000)
+        queries.append(recorder.count)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'name': name,
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries_per_request': round(sum(queries) / requests, 2),
+        'rps': round(requests / elapsed, 1),
+    }
+
+
+def build_report(results, dataset=None):
+    return {
+        'created': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': dataset or {},
+        'results': results,
+    }
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as report_file:
+        return json.load(report_file)
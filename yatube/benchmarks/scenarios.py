@@ -0,0 +1,144 @@
+import random
+
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, override_settings
+
+from api.rows import PostRowSerializer
+from api.serializers import PostSerializer
+from posts.cards import attach_cards
+from posts.models import Comment, Follow, Group, Post
+from posts.pagination import CursorPaginator
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Зарегистрировать сценарий: функцию, возвращающую пары (имя, вызов)."""
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+def _get(client, url):
+    def call():
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+    return call
+
+
+def _sample():
+    post = Post.objects.select_related('author').order_by('?').first()
+    follow = Follow.objects.select_related('user').order_by('?').first()
+    group = Group.objects.exclude(posts=None).order_by('?').first()
+    commented = (Comment.objects
+                 .order_by('?')
+                 .values_list('post_id', flat=True)
+                 .first())
+    return post, follow, group, commented
+
+
+@scenario('views')
+def views_scenario():
+    post, follow, group, _ = _sample()
+    guest = Client()
+    reader = Client()
+    reader.force_login(follow.user)
+    return [
+        ('index', _get(guest, '/')),
+        ('group_posts', _get(guest, f'/group/{group.slug}/')),
+        ('profile', _get(guest, f'/{post.author.username}/')),
+        ('post_view',
+         _get(guest, f'/{post.author.username}/{post.pk}/')),
+        ('follow_index', _get(reader, '/follow/')),
+    ]
+
+
+@scenario('api')
+def api_scenario():
+    post, _, _, commented = _sample()
+    client = Client()
+    return [
+        ('api_posts', _get(client, '/api/v1/posts/')),
+        ('api_posts_page',
+         _get(client, '/api/v1/posts/?limit=20&offset=1000')),
+        ('api_post', _get(client, f'/api/v1/posts/{post.pk}/')),
+        ('api_comments',
+         _get(client, f'/api/v1/posts/{commented}/comments/')),
+        ('api_groups', _get(client, '/api/v1/groups/')),
+    ]
+
+
+@scenario('search')
+def search_scenario():
+    """Полнотекстовый поиск против прежнего ILIKE '%слово%'."""
+    post, _, _, _ = _sample()
+    words = [word.strip('.,!?') for word in post.text.split()]
+    word = random.choice([word for word in words if len(word) > 3] or words)
+    client = Client()
+
+    def icontains():
+        list(Post.objects.filter(text__icontains=word)[:20])
+
+    def full_text():
+        list(Post.objects.search(word)[:20])
+
+    return [
+        ('search_icontains', icontains),
+        ('search_full_text', full_text),
+        ('search_view', _get(client, f'/search/?q={word}')),
+    ]
+
+
+@scenario('serialization')
+def serialization_scenario():
+    """Списки API через ModelSerializer и через строки .values()."""
+    client = Client()
+    page = Post.objects.select_related('author')[:100]
+
+    def model_serializer():
+        PostSerializer(list(page), many=True).data
+
+    def row_serializer():
+        rows = PostRowSerializer()
+        rows.serialize(rows.get_rows(page))
+
+    def endpoint(fast):
+        def call():
+            with override_settings(API_FAST_LIST=fast):
+                _get(client, '/api/v1/posts/?limit=100&offset=0')()
+        return call
+
+    return [
+        ('serialize_100_model', model_serializer),
+        ('serialize_100_rows', row_serializer),
+        ('api_posts_100_model', endpoint(False)),
+        ('api_posts_100_rows', endpoint(True)),
+    ]
+
+
+@scenario('templates')
+def templates_scenario():
+    """Лента на 10 и 100 постов на шаблонах Django и Jinja2.
+
+    Карточки постов берутся из кэша, как в рабочем режиме, так что
+    измеряется цикл по includes/post_item.html и обвязка страницы.
+    """
+    _, follow, _, _ = _sample()
+    request = RequestFactory().get('/')
+    request.user = follow.user
+    posts = Post.objects.select_related('author', 'group')
+
+    def render(page, engine):
+        def call():
+            render_to_string('index.html', {'page': page},
+                             request=request, using=engine)
+        return call
+
+    calls = []
+    for size in (10, 100):
+        page = CursorPaginator(posts, size).get_page(None)
+        attach_cards(page)
+        for engine in ('django', 'jinja2'):
+            calls.append((f'feed_{size}_{engine}', render(page, engine)))
+    return calls
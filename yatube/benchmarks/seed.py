@@ -0,0 +1,87 @@
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from faker import Faker
+from mixer.backend.django import Mixer
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+fake = Faker('ru_RU')
+mixer = Mixer(commit=False)
+
+
+def _batches(total, batch_size):
+    while total > 0:
+        yield min(total, batch_size)
+        total -= batch_size
+
+
+def seed(users=1000, groups=20, posts=20000, comments=50000, follows=10000,
+         batch_size=1000):
+    """Заполнить базу синтетическими данными пачками через bulk_create.
+
+    Сигналы при bulk_create не срабатывают, поэтому производные данные
+    (счетчики, ленты подписок) пересчитываются в конце.
+    """
+    prefix = fake.unique.lexify('????').lower()
+    created_users = []
+    for number in range(users):
+        user = mixer.blend(User, username=f'bench_{prefix}_{number}')
+        user.set_unusable_password()
+        created_users.append(user)
+    User.objects.bulk_create(created_users, batch_size=batch_size)
+    user_ids = list(User.objects
+                    .filter(username__startswith=f'bench_{prefix}_')
+                    .values_list('pk', flat=True))
+
+    Group.objects.bulk_create(
+        [mixer.blend(Group, slug=f'bench-{prefix}-{number}')
+         for number in range(groups)],
+        batch_size=batch_size)
+    group_ids = list(Group.objects
+                     .filter(slug__startswith=f'bench-{prefix}-')
+                     .values_list('pk', flat=True))
+
+    for size in _batches(posts, batch_size):
+        Post.objects.bulk_create(
+            Post(text=fake.paragraph(nb_sentences=5),
+                 author_id=random.choice(user_ids),
+                 group_id=random.choice(group_ids + [None]))
+            for _ in range(size))
+    post_ids = list(Post.objects
+                    .filter(author_id__in=user_ids)
+                    .values_list('pk', flat=True))
+
+    for size in _batches(comments, batch_size):
+        Comment.objects.bulk_create(
+            Comment(text=fake.sentence(),
+                    author_id=random.choice(user_ids),
+                    post_id=random.choice(post_ids))
+            for _ in range(size))
+
+    pairs = set()
+    while len(pairs) < min(follows, len(user_ids) * (len(user_ids) - 1)):
+        user_id, author_id = random.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in pairs],
+        batch_size=batch_size, ignore_conflicts=True)
+
+    call_command('recount_comments', batch_size=batch_size,
+                 stdout=StringIO())
+    Post.objects.filter(pk__in=post_ids).update_search_vector()
+    for user_id, author_id in pairs:
+        timeline.follow_added(user_id, author_id)
+    call_command('recount_author_stats', batch_size=batch_size,
+                 stdout=StringIO())
+
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': len(post_ids),
+        'comments': comments,
+        'follows': len(pairs),
+    }
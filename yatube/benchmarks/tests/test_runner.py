@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Comment, Post, TimelineEntry
+from ..runner import measure, percentile
+from ..scenarios import SCENARIOS
+from ..seed import seed
+
+
+class BenchmarkTest(TestCase):
+    RESULT_KEYS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request',
+                   'rps')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+
+    def test_seed_and_scenarios(self):
+        """Сценарии выполняются на сгенерированных данных."""
+        created = seed(users=5, groups=2, posts=20, comments=30, follows=6,
+                       batch_size=7)
+        self.assertEqual(created['posts'], 20)
+        self.assertEqual(
+            sum(Post.objects.values_list('comment_count', flat=True)),
+            Comment.objects.count())
+        self.assertTrue(TimelineEntry.objects.exists())
+        for name, build in SCENARIOS.items():
+            for label, call in build():
+                with self.subTest(scenario=name, label=label):
+                    result = measure(label, call, requests=2, warmup=1)
+                    for key in self.RESULT_KEYS:
+                        self.assertIn(key, result)
@@ -0,0 +1,150 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import routers
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_path(task):
+    """Путь импорта функции задачи."""
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, *args, key=None, delay=0, max_attempts=None, **kwargs):
+    """Поставить вызов task(*args, **kwargs) в очередь.
+
+    Задача записывается в текущей транзакции, поэтому воркер увидит ее
+    только вместе с данными, ради которых она создана. Аргументы должны
+    сериализоваться в JSON. Если в очереди уже ждет задача с тем же
+    key, новая не добавляется.
+    """
+    job = Job(
+        task=task_path(task),
+        args=list(args),
+        kwargs=kwargs,
+        key=key,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    Job.objects.bulk_create([job], ignore_conflicts=True)
+    return job
+
+
+def claim():
+    """Забрать следующую готовую задачу, не дожидаясь чужих блокировок.
+
+    SELECT ... FOR UPDATE SKIP LOCKED позволяет нескольким воркерам
+    разбирать очередь параллельно: строку, которую уже забирает другой
+    воркер, этот просто пропускает. Задачи, которые выполняются дольше
+    JOB_TIMEOUT (воркер упал), забираются повторно.
+    """
+    while True:
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.JOB_TIMEOUT)
+        with transaction.atomic():
+            job = (Job.objects
+                   .select_for_update(skip_locked=True)
+                   .filter(Q(status=Job.QUEUED, run_at__lte=now)
+                           | Q(status=Job.RUNNING, started__lt=stale))
+                   .order_by('run_at', 'pk')
+                   .first())
+            if job is None:
+                return None
+            if job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.finished = now
+                job.error = 'Превышено время выполнения'
+                job.save(update_fields=['status', 'finished', 'error'])
+                continue
+            job.status = Job.RUNNING
+            job.started = now
+            job.attempts += 1
+            job.save(update_fields=['status', 'started', 'attempts'])
+        return job
+
+
+def run(job):
+    """Выполнить забранную задачу и записать итог и длительность.
+
+    Упавшая задача возвращается в очередь с задержкой JOB_RETRY_DELAY,
+    удваивающейся с каждой попыткой, пока не кончатся max_attempts.
+    Задача читает с основной базы: она обрабатывает только что
+    записанные данные, которых на реплике может еще не быть.
+    Закрепление снимается после задачи, как middleware снимает его
+    после запроса.
+    """
+    routers.reset()
+    routers.pin_to_primary()
+    try:
+        return _run(job)
+    finally:
+        routers.reset()
+
+
+def _run(job):
+    started = time.monotonic()
+    error = ''
+    try:
+        import_string(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+    duration = (time.monotonic() - started) * 1000
+    update = {'duration': duration, 'error': error}
+    if not error:
+        update.update(status=Job.DONE, finished=timezone.now())
+        logger.info('%s: готово за %.1fms', job, duration)
+    elif job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        update.update(status=Job.QUEUED,
+                      run_at=timezone.now() + timedelta(seconds=delay))
+        logger.warning('%s: попытка %d упала за %.1fms, повтор через %dс',
+                       job, job.attempts, duration, delay)
+    else:
+        update.update(status=Job.FAILED, finished=timezone.now())
+        logger.error('%s: последняя попытка упала за %.1fms\n%s',
+                     job, duration, error)
+    Job.objects.filter(pk=job.pk).update(**update)
+    return not error
+
+
+def run_pending():
+    """Выполнить все готовые задачи в текущем потоке."""
+    processed = 0
+    while True:
+        job = claim()
+        if job is None:
+            return processed
+        run(job)
+        processed += 1
+
+
+def purge():
+    """Удалить выполненные задачи старше JOB_KEEP_FINISHED."""
+    border = timezone.now() - timedelta(seconds=settings.JOB_KEEP_FINISHED)
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, finished__lt=border).delete()
+    return deleted
+
+
+def stats():
+    """Число задач по статусам и время выполнения по функциям."""
+    return (Job.objects
+            .values('task')
+            .annotate(queued=Count('pk', filter=Q(status=Job.QUEUED)),
+                      done=Count('pk', filter=Q(status=Job.DONE)),
+                      failed=Count('pk', filter=Q(status=Job.FAILED)),
+                      avg_duration=Avg('duration'),
+                      max_duration=Max('duration'))
+            .order_by('task'))
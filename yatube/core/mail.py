@@ -0,0 +1,66 @@
+import base64
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import jobs
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только ставит письма в очередь задач.
+
+    Отправку выполняет воркер через QUEUED_EMAIL_BACKEND, так что
+    запрос не ждет SMTP-сервер.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            jobs.enqueue(deliver, serialize(message))
+        return len(email_messages)
+
+
+def serialize(message):
+    """Письмо в виде словаря, пригодного для JSON."""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, tuple):
+            filename, content, mimetype = attachment
+        else:
+            filename = attachment.get_filename()
+            content = attachment.get_payload(decode=True)
+            mimetype = attachment.get_content_type()
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            [filename, base64.b64encode(content).decode(), mimetype])
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': [list(item) for item in
+                         getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+        'content_subtype': message.content_subtype,
+    }
+
+
+def deliver(data):
+    """Задача очереди: отправить письмо настоящим бэкендом."""
+    data = dict(data)
+    alternatives = data.pop('alternatives')
+    attachments = data.pop('attachments')
+    content_subtype = data.pop('content_subtype')
+    message = EmailMultiAlternatives(
+        alternatives=[tuple(item) for item in alternatives],
+        connection=get_connection(settings.QUEUED_EMAIL_BACKEND),
+        **data)
+    message.content_subtype = content_subtype
+    for filename, content, mimetype in attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    message.send()
@@ -0,0 +1,75 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    """Воркер очереди фоновых задач core.jobs."""
+    help = 'Выполняет задачи из таблицы job в нескольких потоках.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_CONCURRENCY,
+            help='Сколько задач выполнять параллельно.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать готовые задачи и выйти.')
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать статистику задач и выйти.')
+
+    def handle(self, *args, concurrency, once, stats, **options):
+        if stats:
+            self.write_stats()
+            return
+        if isinstance(caches['default'], LocMemCache):
+            # Сброс кэша из задач не дойдет до процессов веб-сервера.
+            self.stderr.write('Кэш LocMemCache не общий с веб-сервером: '
+                              'задайте MEMCACHED_LOCATION.')
+        jobs.purge()
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: stop.set())
+        counter = []
+        threads = [
+            threading.Thread(target=self.work, args=(stop, once, counter),
+                             name=f'jobs-{number}')
+            for number in range(max(concurrency, 1))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(f'Выполнено задач: {len(counter)}')
+
+    def work(self, stop, once, counter):
+        try:
+            while not stop.is_set():
+                job = jobs.claim()
+                if job is None:
+                    if once:
+                        return
+                    stop.wait(settings.JOB_POLL_INTERVAL)
+                    continue
+                jobs.run(job)
+                counter.append(job.pk)
+        finally:
+            connections.close_all()
+
+    def write_stats(self):
+        self.stdout.write(
+            f'{"задача":40} {"ждут":>6} {"готово":>7} {"ошибки":>7} '
+            f'{"среднее, мс":>12} {"максимум, мс":>13}')
+        for row in jobs.stats():
+            self.stdout.write(
+                f'{row["task"]:40} {row["queued"]:6} {row["done"]:7} '
+                f'{row["failed"]:7} {row["avg_duration"] or 0:12.1f} '
+                f'{row["max_duration"] or 0:13.1f}')
@@ -0,0 +1,70 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import routers
+from .querycount import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCountMiddleware:
+    """Записывает число и время SQL-запросов каждого запроса.
+
+    Включается настройкой QUERY_INSTRUMENTATION. Итоги попадают в
+    заголовки X-Query-Count и X-Query-Time, повторяющиеся запросы
+    пишутся в лог как предупреждение.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        duration_ms = recorder.duration * 1000
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time'] = f'{duration_ms:.1f}ms'
+        logger.info('%s %s: %d queries in %.1fms', request.method,
+                    request.path, recorder.count, duration_ms)
+        for sql, number in recorder.repeated(
+                settings.QUERY_REPEAT_THRESHOLD):
+            logger.warning('%s %s: query repeated %d times: %s',
+                           request.method, request.path, number, sql)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет за основной базой пишущие запросы и их автора.
+
+    Небезопасные методы читают с основной базы. После записи клиент
+    получает cookie и еще REPLICA_PIN_SECONDS секунд читает оттуда же,
+    пока реплики догоняют основную базу. Без DATABASE_REPLICAS
+    middleware отключается.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        if (request.method not in self.SAFE_METHODS
+                or settings.REPLICA_PIN_COOKIE in request.COOKIES):
+            routers.pin_to_primary()
+        try:
+            response = self.get_response(request)
+            wrote = routers.has_written()
+        finally:
+            routers.reset()
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
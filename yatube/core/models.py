@@ -0,0 +1,50 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from django.db.models import Q, UniqueConstraint
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача: вызов функции по пути импорта (core.jobs)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Функция', max_length=200)
+    args = JSONField('Аргументы', default=list)
+    kwargs = JSONField('Именованные аргументы', default=dict)
+    # Ключ склеивает одинаковые задачи, пока они ждут в очереди.
+    key = models.CharField('Ключ', max_length=255, blank=True, null=True)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    started = models.DateTimeField('Начата', blank=True, null=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+    duration = models.FloatField('Длительность, мс', blank=True, null=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    class Meta:
+        db_table = 'job'
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx'),
+        ]
+        constraints = [
+            UniqueConstraint(
+                fields=['key'],
+                condition=Q(status='queued', attempts=0),
+                name='job_unique_queued_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,50 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def fingerprint(sql):
+    """Привести запрос к виду, общему для запросов с разными параметрами."""
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return NUMBER_RE.sub('N', sql)
+
+
+class QueryRecorder:
+    """Сборщик числа, времени и отпечатков SQL-запросов.
+
+    Подключается через connection.execute_wrapper ко всем базам.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(self))
+            yield self
+
+    def repeated(self, threshold):
+        """Отпечатки, повторившиеся не меньше threshold раз (N+1)."""
+        return [(sql, number)
+                for sql, number in self.fingerprints.most_common()
+                if number >= threshold]
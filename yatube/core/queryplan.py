@@ -0,0 +1,34 @@
+from django.db import connections
+
+SLOW_NODES = ('Seq Scan', 'Sort', 'Incremental Sort')
+
+# Планировщик избегает этих узлов, но оставляет их, если иначе нельзя:
+# тогда в плане видно, что для запроса нет подходящего индекса.
+PLANNER_SETTINGS = ('enable_seqscan', 'enable_sort')
+
+
+def explain(sql, using='default'):
+    """План запроса в JSON с запрещенными Seq Scan и Sort."""
+    with connections[using].cursor() as cursor:
+        for name in PLANNER_SETTINGS:
+            cursor.execute(f'SET {name} = off')
+        try:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            return cursor.fetchone()[0][0]['Plan']
+        finally:
+            for name in PLANNER_SETTINGS:
+                cursor.execute(f'RESET {name}')
+
+
+def slow_nodes(plan):
+    """Узлы плана с последовательным сканированием или сортировкой."""
+    nodes = [plan] if plan['Node Type'] in SLOW_NODES else []
+    for child in plan.get('Plans', ()):
+        nodes.extend(slow_nodes(child))
+    return nodes
+
+
+def describe(node):
+    if node['Node Type'] == 'Seq Scan':
+        return f"Seq Scan on {node['Relation Name']}"
+    return f"{node['Node Type']} by {', '.join(node.get('Sort Key', ()))}"
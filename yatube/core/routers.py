@@ -0,0 +1,62 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+# Модели таблиц DatabaseCache (кэш отзыва JWT).
+CACHE_APP_LABEL = 'django_cache'
+
+
+def pin_to_primary():
+    """Читать с основной базы до конца текущего запроса."""
+    _state.pinned = True
+
+
+def reset():
+    """Сбросить закрепление и отметку о записи в начале запроса."""
+    _state.pinned = False
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def has_written():
+    return getattr(_state, 'wrote', False)
+
+
+class ReplicaRouter:
+    """Чтение с реплик из DATABASE_REPLICAS, запись в основную базу.
+
+    Чтение остается на основной базе, если поток закреплен за ней
+    (запрос пользователя, который только что писал) или открыта
+    транзакция: внутри нее нужно видеть собственные изменения.
+    Таблицы кэша всегда читаются с основной базы — отставание реплики
+    вернуло бы отозванный токен, — а запись в них не закрепляет поток.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or is_pinned()
+                or model._meta.app_label == CACHE_APP_LABEL
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        pin_to_primary()
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
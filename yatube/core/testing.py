@@ -0,0 +1,51 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .queryplan import describe, explain, slow_nodes
+from .querycount import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """Примесь к TestCase для проверки бюджета SQL-запросов на URL."""
+    REPEAT_THRESHOLD = 3
+
+    def assertQueryBudget(self, url, budget, client=None, method='get',
+                          **kwargs):
+        client = client or self.client
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = getattr(client, method)(url, **kwargs)
+        if recorder.count > budget:
+            repeated = '\n'.join(
+                f'  {number}x {sql}'
+                for sql, number in recorder.repeated(self.REPEAT_THRESHOLD))
+            self.fail(f'{method.upper()} {url}: {recorder.count} запросов '
+                      f'при бюджете {budget}\n{repeated}')
+        return response
+
+
+class QueryPlanMixin:
+    """Примесь к TestCase: EXPLAIN всех SELECT, выполненных на URL.
+
+    Тест падает, если в плане остался Seq Scan или Sort по таблице, не
+    перечисленной в allowed_tables (например, маленький справочник).
+    """
+
+    def assertIndexedPlans(self, url, client=None, allowed_tables=(),
+                           **kwargs):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, **kwargs)
+        problems = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            for node in slow_nodes(explain(sql)):
+                if node.get('Relation Name') in allowed_tables:
+                    continue
+                problems.append(f'  {describe(node)}: {sql}')
+        if problems:
+            self.fail(f'GET {url}: запросы без индекса\n'
+                      + '\n'.join(problems))
+        return response
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import jobs, routers
+from ..models import Job
+
+calls = []
+
+
+def record(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+def record_pin():
+    calls.append(routers.is_pinned())
+
+
+def fail():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=10, JOB_TIMEOUT=60)
+class JobQueueTest(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_job_runs_with_arguments(self):
+        """Задача выполняется с сохраненными аргументами и временем."""
+        jobs.enqueue(record, 1, 'a', flag=True)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [((1, 'a'), {'flag': True})])
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.duration)
+
+    def test_job_reads_primary_and_clears_pin(self):
+        """Задача читает с основной базы, закрепление не переживает ее."""
+        jobs.enqueue(record_pin)
+        self.assertTrue(jobs.run(jobs.claim()))
+        self.assertEqual(calls, [True])
+        self.assertFalse(routers.is_pinned())
+        self.assertFalse(routers.has_written())
+
+    def test_same_key_is_queued_once(self):
+        """Ожидающая задача с тем же ключом не дублируется."""
+        for _ in range(2):
+            jobs.enqueue(record, key='same')
+        jobs.enqueue(record, key='other')
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_delayed_job_waits(self):
+        """Отложенная задача не забирается раньше срока."""
+        jobs.enqueue(record, delay=60)
+        self.assertIsNone(jobs.claim())
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Упавшая задача повторяется с задержкой, затем помечается."""
+        jobs.enqueue(fail)
+        jobs.run_pending()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at,
+                           timezone.now() + timedelta(seconds=5))
+        self.assertIn('RuntimeError', job.error)
+        self.assertIsNone(jobs.claim())
+        Job.objects.update(run_at=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_lost_job_is_claimed_again(self):
+        """Задачу упавшего воркера забирают после JOB_TIMEOUT."""
+        jobs.enqueue(record)
+        self.assertIsNotNone(jobs.claim())
+        self.assertIsNone(jobs.claim())
+        Job.objects.update(started=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(Job.objects.get().attempts, 2)
+
+    def test_stats_command(self):
+        """run_jobs --stats показывает итоги по функциям."""
+        jobs.enqueue(record)
+        jobs.run_pending()
+        output = StringIO()
+        call_command('run_jobs', '--stats', stdout=output)
+        self.assertIn('core.tests.test_jobs.record', output.getvalue())
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class QueuedEmailTest(TestCase):
+
+    def test_mail_is_sent_by_worker(self):
+        """Письмо уходит только при выполнении задачи очереди."""
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('note.txt', 'вложение', 'text/plain')
+        message.send()
+        self.assertEqual(len(mail.outbox), 0)
+        jobs.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        sent = mail.outbox[0]
+        self.assertEqual(sent.to, ['to@example.com'])
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
+        self.assertEqual(sent.attachments[0][0], 'note.txt')
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+
+class QueryCountMiddlewareTest(TestCase):
+    HOMEPAGE_URL = '/'
+    COUNT_HEADER = 'X-Query-Count'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_disabled_by_default(self):
+        """Без настройки заголовки не добавляются."""
+        response = Client().get(self.HOMEPAGE_URL)
+        self.assertFalse(response.has_header(self.COUNT_HEADER))
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_headers_added(self):
+        """Включенный middleware пишет число и время запросов."""
+        with self.assertLogs('core.middleware', level='INFO'):
+            response = Client().get(self.HOMEPAGE_URL)
+        self.assertTrue(int(response[self.COUNT_HEADER]) > 0)
+        self.assertTrue(response['X-Query-Time'].endswith('ms'))
@@ -0,0 +1,120 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post, User
+from .. import routers
+from ..middleware import ReplicaPinMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTest(SimpleTestCase):
+    COOKIE = 'pin_primary'
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        routers.reset()
+        self.addCleanup(routers.reset)
+
+    def handle(self, method='get', cookies=None, write=False):
+        """Пропустить запрос через middleware и запомнить базу чтения."""
+        read_from = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            read_from.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinMiddleware(view)(request)
+        return read_from[0], response
+
+    def test_reads_go_to_replicas(self):
+        """Чтение идет на реплики, запись на основную базу."""
+        self.assertIn(self.router.db_for_read(Post),
+                      ('replica_1', 'replica_2'))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_cache_tables_use_primary(self):
+        """Кэш в базе читается с основной базы, запись в него не закрепляет."""
+        model = caches['tokens'].cache_model_class
+        self.assertEqual(self.router.db_for_read(model), 'default')
+        self.assertEqual(self.router.db_for_write(model), 'default')
+        self.assertFalse(routers.is_pinned())
+        self.assertFalse(routers.has_written())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Без реплик все читается с основной базы."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_on_primary(self):
+        """Миграции применяются только к основной базе."""
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'posts'))
+
+    def test_read_after_write_in_request(self):
+        """После записи запрос дочитывает с основной базы и ставит cookie."""
+        database, response = self.handle(write=True)
+        self.assertEqual(database, 'default')
+        self.assertIn(self.COOKIE, response.cookies)
+        self.assertFalse(routers.is_pinned())
+
+    def test_unsafe_method_reads_primary(self):
+        """POST читает с основной базы."""
+        database, _ = self.handle(method='post')
+        self.assertEqual(database, 'default')
+
+    def test_cookie_pins_following_reads(self):
+        """С cookie чтение остается на основной базе."""
+        database, response = self.handle(cookies={self.COOKIE: '1'})
+        self.assertEqual(database, 'default')
+        self.assertNotIn(self.COOKIE, response.cookies)
+
+    def test_plain_get_reads_replica(self):
+        """Обычный GET читает с реплики и не ставит cookie."""
+        database, response = self.handle()
+        self.assertNotEqual(database, 'default')
+        self.assertNotIn(self.COOKIE, response.cookies)
+
+
+@skipUnless('replica_1' in settings.DATABASES,
+            'вторая база задается в yatube.test_settings')
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Запросы к настоящей второй базе.
+
+    TransactionTestCase: внутри транзакции TestCase маршрутизатор
+    намеренно читает только с основной базы.
+    """
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user')
+        routers.reset()
+        self.addCleanup(routers.reset)
+
+    def read_user(self):
+        """Прочитать пользователя, вернуть число запросов по базам."""
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections['replica_1']) as replica:
+            self.assertEqual(User.objects.get(pk=self.user.pk), self.user)
+        return len(default), len(replica)
+
+    def test_read_goes_to_replica(self):
+        """Чтение без записи выполняется на реплике."""
+        self.assertEqual(self.read_user(), (0, 1))
+
+    def test_write_pins_next_read(self):
+        """После записи следующее чтение идет в основную базу."""
+        self.user.first_name = 'Имя'
+        self.user.save()
+        self.assertEqual(self.read_user(), (1, 0))
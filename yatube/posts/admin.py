@@ -11,7 +11,8 @@ class CommentInLine(admin.TabularInline):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('text', 'pub_date', 'author',)
+    list_display = ('text', 'pub_date', 'author', 'comment_count')
+    readonly_fields = ('comment_count',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = EMPTY_VALUE
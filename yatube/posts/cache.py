@@ -0,0 +1,85 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.cache import cache_page
+
+FEED_GENERATION = 'feed'
+GROUPS_GENERATION = 'groups'
+# Изменения постов PullAuthor для всех лент подписок.
+PULL_FEEDS_GENERATION = 'pull-feeds'
+
+
+def user_generation(user_id):
+    """Имя поколения ленты подписок пользователя."""
+    return f'user:{user_id}'
+
+
+def profile_generation(username):
+    """Имя поколения страницы профиля: посты и счетчики подписок."""
+    return f'profile:{username}'
+
+
+def group_generation(slug):
+    """Имя поколения страницы группы."""
+    return f'group:{slug}'
+
+
+def comments_generation(post_id):
+    """Имя поколения списка комментариев поста."""
+    return f'comments:{post_id}'
+
+
+def _generation_key(name):
+    return f'generation:{name}'
+
+
+def get_generation(name):
+    """Текущее поколение именованного набора закэшированных страниц."""
+    key = _generation_key(name)
+    generation = cache.get(key)
+    if generation is None:
+        # Начальное значение от времени не совпадет с поколением,
+        # под которым страницы кэшировались до вытеснения ключа.
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def bump_generation(name):
+    """Сделать устаревшими все страницы поколения.
+
+    Поколение увеличивается сразу, чтобы автор увидел изменения, и еще
+    раз после коммита: страница, собранная параллельным запросом до
+    коммита, не останется в кэше под новым поколением.
+    """
+    key = _generation_key(name)
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def cache_page_versioned(timeout, key_prefix, generation=FEED_GENERATION):
+    """Аналог cache_page, ключи которого зависят от поколения."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            prefix = f'{key_prefix}.{get_generation(generation)}'
+            cached_view = cache_page(timeout, key_prefix=prefix)(view_func)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def make_etag(*parts):
+    """ETag из поколений и других дешевых признаков свежести ресурса."""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
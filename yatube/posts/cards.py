@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .thumbnails import prefetch_thumbnails
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def card_key(post):
+    return f'post_card:{post.pk}:{post.version}'
+
+
+def attach_cards(posts):
+    """Подставить постам отрисованные карточки.
+
+    Все карточки страницы читаются из кэша одним get_many, шаблон
+    отрисовывается только для промахов, а их миниатюры ищутся одним
+    обращением к хранилищу sorl-thumbnail. Карточка не зависит от
+    пользователя, а версия поста в ключе меняется при правке поста,
+    новых комментариях и изменении его группы.
+    """
+    keyed_posts = {card_key(post): post for post in posts}
+    cached = cache.get_many(list(keyed_posts))
+    missing = {key: post for key, post in keyed_posts.items()
+               if key not in cached}
+    rendered = {}
+    if missing:
+        with prefetch_thumbnails(post.image for post in missing.values()):
+            for key, post in missing.items():
+                rendered[key] = render_to_string(
+                    CARD_TEMPLATE, {'post': post},
+                    using=settings.FEED_TEMPLATE_ENGINE)
+    for key, post in keyed_posts.items():
+        post.card = mark_safe(cached[key] if key in cached else rendered[key])
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
@@ -0,0 +1,64 @@
+from .cache import (FEED_GENERATION, PULL_FEEDS_GENERATION, bump_generation,
+                    get_generation, group_generation, make_etag,
+                    profile_generation, user_generation)
+from .models import Follow, Group, PullAuthor, User
+
+
+def _etag(request, *parts):
+    # Страница зависит от зрителя (меню, кнопки) и параметров паджинации.
+    return make_etag(request.user.pk, request.get_full_path(), *parts)
+
+
+def feed_etag(request, *args, **kwargs):
+    """ETag главной страницы."""
+    return _etag(request, get_generation(FEED_GENERATION))
+
+
+def group_etag(request, slug):
+    """ETag страницы группы: меняется только вместе с ее постами."""
+    return _etag(request, get_generation(group_generation(slug)))
+
+
+def profile_etag(request, username):
+    """ETag профиля: посты и подписки автора."""
+    return _etag(request, get_generation(profile_generation(username)))
+
+
+def follow_etag(request):
+    """ETag ленты подписок: подписки читателя и посты его авторов.
+
+    Посты PullAuthor не раскладываются по лентам, поэтому их изменения
+    отмечаются одним общим поколением для всех лент подписок.
+    """
+    return _etag(request,
+                 get_generation(user_generation(request.user.pk)),
+                 get_generation(PULL_FEEDS_GENERATION))
+
+
+def posts_changed(group_ids=(), author_ids=()):
+    """Устарели страницы с постами этих групп и авторов.
+
+    Общая лента, страницы групп, профили авторов и ленты подписок их
+    читателей. Имена групп и авторов и подписчики читаются здесь, при
+    записи, чтобы проверка ETag при чтении не ходила в базу.
+    """
+    group_ids = set(group_ids) - {None}
+    author_ids = set(author_ids) - {None}
+    names = [FEED_GENERATION]
+    if group_ids:
+        names += [group_generation(slug) for slug in Group.objects.filter(
+            pk__in=group_ids).values_list('slug', flat=True)]
+    if author_ids:
+        names += [profile_generation(username) for username in
+                  User.objects.filter(pk__in=author_ids)
+                  .values_list('username', flat=True)]
+        pull_ids = set(PullAuthor.objects.filter(author__in=author_ids)
+                       .values_list('author_id', flat=True))
+        if pull_ids:
+            names.append(PULL_FEEDS_GENERATION)
+        if author_ids - pull_ids:
+            names += [user_generation(user_id) for user_id in
+                      Follow.objects.filter(author__in=author_ids - pull_ids)
+                      .values_list('user_id', flat=True).distinct()]
+    for name in names:
+        bump_generation(name)
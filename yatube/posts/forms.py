@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import ImageIngestError, ingest_image
 from .models import Comment, Post
 
 
@@ -15,6 +17,16 @@ class PostForm(forms.ModelForm):
             'group': 'Выберите группу вашего поста',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        try:
+            return ingest_image(image)
+        except ImageIngestError:
+            raise forms.ValidationError(
+                'Не удалось обработать изображение')
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,163 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.db.models import F
+from PIL import Image, ImageOps, features
+from sorl.thumbnail import delete as delete_thumbnailed
+
+from core.jobs import enqueue
+
+from .etags import posts_changed
+from .loaders import invalidate_post_detail
+from .models import Post
+
+# Формат хранения: (формат Pillow, расширение, MIME-тип).
+JPEG = ('JPEG', 'jpg', 'image/jpeg')
+PNG = ('PNG', 'png', 'image/png')
+WEBP = ('WEBP', 'webp', 'image/webp')
+
+
+class ImageIngestError(Exception):
+    """Загруженный файл не удалось прочитать как изображение."""
+
+
+def _has_alpha(image):
+    return (image.mode in ('RGBA', 'LA')
+            or (image.mode == 'P' and 'transparency' in image.info))
+
+
+def _encode(image, image_format):
+    """Сохранить изображение заново, без EXIF и прочих метаданных."""
+    pillow_format = image_format[0]
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    output = BytesIO()
+    options = {'optimize': True}
+    if pillow_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.IMAGE_QUALITY
+    if pillow_format == 'JPEG':
+        options['progressive'] = True
+    image.save(output, pillow_format, **options)
+    return output.getvalue()
+
+
+def ingest_image(upload):
+    """Привести загрузку к безопасному и разумному по размеру файлу.
+
+    Поворачивает по EXIF, уменьшает до IMAGE_MAX_SIZE по большей
+    стороне и пересохраняет: JPEG, либо PNG для изображений с
+    прозрачностью. Метаданные при этом не переносятся.
+    """
+    try:
+        image = Image.open(upload)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except Exception as error:
+        raise ImageIngestError(str(error)) from error
+    image_format = PNG if _has_alpha(image) else JPEG
+    if image_format is PNG and image.mode == 'P':
+        image = image.convert('RGBA')
+    max_size = settings.IMAGE_MAX_SIZE
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(
+        f'{stem}.{image_format[1]}', _encode(image, image_format),
+        image_format[2])
+
+
+def variant_formats():
+    """Форматы вариантов; WebP, только если Pillow собран с ним."""
+    if features.check('webp'):
+        return (JPEG, WEBP)
+    return (JPEG,)
+
+
+def build_variants(name):
+    """Сохранить варианты изображения по ширинам POST_IMAGE_WIDTHS.
+
+    Варианты обрезаются по центру до пропорций карточки поста
+    (POST_IMAGE_ASPECT) и не увеличиваются сверх исходной ширины.
+    Возвращает словарь для Post.image_variants.
+    """
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+    aspect_width, aspect_height = settings.POST_IMAGE_ASPECT
+    widths = [width for width in settings.POST_IMAGE_WIDTHS
+              if width <= image.width] or [image.width]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {'source': name}
+    for image_format in variant_formats():
+        saved = []
+        for width in widths:
+            height = max(round(width * aspect_height / aspect_width), 1)
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            saved.append([width, default_storage.save(
+                f'posts/variants/{stem}_{width}.{image_format[1]}',
+                ContentFile(_encode(resized, image_format)))])
+        variants[image_format[1]] = saved
+    return variants
+
+
+def variant_names(variants):
+    """Имена файлов вариантов из Post.image_variants."""
+    return [name for key, saved in (variants or {}).items()
+            if key != 'source' for _, name in saved]
+
+
+def generate_variants(post_id, name):
+    """Создать варианты и записать их посту, если картинка не сменилась.
+
+    Файлы прежних вариантов удаляются, как и только что созданные, если
+    картинку успели сменить или пост удален.
+    """
+    variants = build_variants(name)
+    with transaction.atomic():
+        previous = (Post.objects.select_for_update()
+                    .filter(pk=post_id, image=name)
+                    .values_list('image_variants', flat=True).first())
+        if previous is None:
+            schedule_image_deletion(variant_names(variants))
+            return
+        Post.objects.filter(pk=post_id).update(
+            image_variants=variants, version=F('version') + 1)
+        schedule_image_deletion(variant_names(previous))
+    invalidate_post_detail(post_id)
+    for group_id, author_id in Post.objects.filter(pk=post_id).values_list(
+            'group_id', 'author_id'):
+        posts_changed((group_id,), (author_id,))
+
+
+def schedule_variants(post_id, name):
+    """Поставить создание вариантов в очередь фоновых задач."""
+    enqueue(generate_variants, post_id, name,
+            key=f'variants:{post_id}:{name}')
+
+
+def delete_images(names):
+    """Удалить файлы, на которые больше не ссылается ни один пост.
+
+    Вместе с файлом удаляются его миниатюры sorl-thumbnail.
+    """
+    in_use = set(Post.objects.filter(image__in=names)
+                 .values_list('image', flat=True))
+    for name in names:
+        if name not in in_use:
+            delete_thumbnailed(name)
+
+
+def schedule_image_deletion(names):
+    """Поставить удаление файлов в очередь фоновых задач.
+
+    Задача пишется в текущей транзакции: при откате файлы остаются.
+    """
+    names = sorted(set(filter(None, names)))
+    if names:
+        enqueue(delete_images, names)
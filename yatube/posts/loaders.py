@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from .models import Post, User
+
+
+def post_detail_key(post_id):
+    return f'post_detail:{post_id}'
+
+
+def get_post_detail(post_id):
+    """Пост вместе с автором и группой: из кэша или одним запросом.
+
+    Если поста нет, поднимается Post.DoesNotExist.
+    """
+    key = post_detail_key(post_id)
+    post = cache.get(key)
+    if post is None:
+        post = Post.objects.select_related('author', 'group').get(pk=post_id)
+        cache.set(key, post, settings.POST_DETAIL_CACHE_TIMEOUT)
+    return post
+
+
+def invalidate_post_detail(*post_ids):
+    """Удалить посты из кэша сейчас и еще раз после коммита.
+
+    Повторное удаление убирает копию, которую параллельный запрос успел
+    положить в кэш до коммита текущей транзакции.
+    """
+    keys = [post_detail_key(post_id) for post_id in post_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def load_author(username):
+    """Автор со счетчиками профиля одним запросом или 404."""
+    return get_object_or_404(
+        User.objects.select_related('stats'), username=username)
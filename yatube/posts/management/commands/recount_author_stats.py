@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import User
+from posts.stats import recount
+
+
+class Command(BaseCommand):
+    """Пересчитать счетчики профилей по таблицам постов и подписок."""
+    help = 'Пересчитывает AuthorStats пачками по id пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько пользователей пересчитывать за один проход.')
+
+    def handle(self, *args, batch_size, **options):
+        last_id = 0
+        total = 0
+        while True:
+            ids = list(User.objects
+                       .filter(pk__gt=last_id)
+                       .order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            with transaction.atomic():
+                total += recount(ids)
+        self.stdout.write(f'Пересчитано профилей: {total}')
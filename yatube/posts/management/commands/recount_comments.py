@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    """Пересчитать разошедшиеся счетчики комментариев у постов."""
+    help = 'Пересчитывает Post.comment_count пачками по id постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов проверять за один проход.')
+
+    def handle(self, *args, batch_size, **options):
+        actual = (Comment.objects
+                  .filter(post=OuterRef('pk'))
+                  .order_by()
+                  .values('post')
+                  .annotate(total=Count('pk'))
+                  .values('total'))
+        last_id = 0
+        fixed = 0
+        while True:
+            ids = list(Post.objects
+                       .filter(pk__gt=last_id)
+                       .order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = (Post.objects
+                       .filter(pk__in=ids)
+                       .annotate(actual=Count('comments'))
+                       .exclude(comment_count=F('actual'))
+                       .values_list('pk', flat=True))
+            with transaction.atomic():
+                fixed += Post.objects.filter(pk__in=list(drifted)).update(
+                    comment_count=Coalesce(Subquery(actual), 0))
+        self.stdout.write(f'Исправлено счетчиков: {fixed}')
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:51
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    actual = (Comment.objects
+              .filter(post=OuterRef('pk'))
+              .order_by()
+              .values('post')
+              .annotate(total=Count('pk'))
+              .values('total'))
+    Post.objects.update(comment_count=Coalesce(Subquery(actual), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_auto_20210804_1453'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='group',
+            name='description',
+            field=models.TextField(validators=[django.core.validators.MaxLengthValidator(500, message='Превышена длина')], verbose_name='Описание'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=models.TextField(validators=[django.core.validators.MaxLengthValidator(3000, message='Превышена длина')], verbose_name='Текст'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:51
+
+from django.db import migrations, models
+import posts.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_image_variants'),
+    ]
+
+    # on_delete работает только в Python: пересоздавать внешний ключ
+    # (с проверкой всей таблицы комментариев) незачем.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='comment',
+                name='post',
+                field=models.ForeignKey(on_delete=posts.models.cascade_post_comments, related_name='comments', to='posts.Post', verbose_name='пост'),
+            ),
+        ]),
+    ]
@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, SearchVectorField)
+from django.core.files.storage import default_storage
 from django.core.validators import MaxLengthValidator
 from django.db import models
-from django.db.models import CheckConstraint, F, Q, UniqueConstraint
+from django.db.models import (CheckConstraint, F, OuterRef, Q, Subquery,
+                              UniqueConstraint)
 
 User = get_user_model()
 
@@ -21,6 +28,25 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+
+    def update_search_vector(self):
+        """Пересобрать search_vector из текста поста и названия группы."""
+        config = settings.SEARCH_CONFIG
+        group_title = Subquery(
+            Group.objects.filter(pk=OuterRef('group_id')).values('title')[:1])
+        return self.update(search_vector=(
+            SearchVector('text', weight='A', config=config)
+            + SearchVector(group_title, weight='B', config=config)))
+
+    def search(self, text):
+        """Посты по полнотекстовому запросу, лучшие совпадения первыми."""
+        query = SearchQuery(text, config=settings.SEARCH_CONFIG)
+        return (self.filter(search_vector=query)
+                .annotate(rank=SearchRank(F('search_vector'), query))
+                .order_by('-rank', '-pub_date', '-pk'))
+
+
 class Post(models.Model):
     """Модель для поста."""
     text = models.TextField(
@@ -28,8 +54,7 @@ class Post(models.Model):
         validators=[MaxLengthValidator(3000, message='Превышена длина')])
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True,
-        db_index=True)
+        auto_now_add=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -47,20 +72,104 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
         null=True, )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False)
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Уменьшенные копии изображения (posts.images): исходное имя и
+    # списки [ширина, имя файла] по форматам.
+    image_variants = JSONField(default=dict, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # Эти поля меняются только отдельными запросами UPDATE (счетчики —
+    # атомарно через x = x + 1), обычное сохранение поста не должно
+    # перезаписывать их устаревшими значениями.
+    DERIVED_FIELDS = ('comment_count', 'version', 'search_vector',
+                      'image_variants')
 
     class Meta:
         db_table = 'post'
         ordering = ('-pub_date',)
+        indexes = [
+            # Ленты: вся, автора и группы, по убыванию даты с id для
+            # курсора — без сортировки в запросе.
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            GinIndex(fields=['search_vector'], name='post_search_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: при переносе поста устаревают
+        # страницы обеих групп. Замененное изображение удаляется.
+        post.loaded_group_id = post.__dict__.get('group_id')
+        post.loaded_image = post.__dict__.get('image') or ''
+        return post
+
+    def _srcset(self, image_format):
+        variants = self.image_variants or {}
+        if not self.image or variants.get('source') != self.image.name:
+            return ''
+        return ', '.join(f'{default_storage.url(name)} {width}w'
+                         for width, name in variants.get(image_format, ()))
+
+    @property
+    def jpeg_srcset(self):
+        """srcset из JPEG-вариантов текущего изображения."""
+        return self._srcset('jpg')
+
+    @property
+    def webp_srcset(self):
+        """srcset из WebP-вариантов текущего изображения."""
+        return self._srcset('webp')
+
+    def save(self, *args, **kwargs):
+        edit = (not self._state.adding
+                and kwargs.get('update_fields') is None)
+        if edit:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.DERIVED_FIELDS
+            ] + ['version']
+            self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        if edit:
+            self.refresh_from_db(fields=['version'])
+
+
+def cascade_post_comments(collector, field, sub_objs, using):
+    """CASCADE, который помечает комментарии удаляемого поста.
+
+    Отметку видит posts.signals.comment_deleted: счетчик поста, который
+    удаляется вместе с комментариями, пересчитывать незачем.
+    """
+    for comment in sub_objs:
+        comment.deleted_with_post = True
+    models.CASCADE(collector, field, sub_objs, using)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
         related_name='comments',
-        on_delete=models.CASCADE,
+        on_delete=cascade_post_comments,
         verbose_name='пост'
     )
     author = models.ForeignKey(
@@ -73,6 +182,13 @@ class Comment(models.Model):
         validators=[MaxLengthValidator(500)])
     created = models.DateTimeField('Дата публикации', auto_now_add=True)
 
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return self.text[:15]
 
@@ -97,3 +213,71 @@ class Follow(models.Model):
                 name='unique_following'),
             CheckConstraint(check=~Q(user=F('author')), name='self_following')
         ]
+
+
+class TimelineEntry(models.Model):
+    """Запись ленты подписок, разложенная подписчику при публикации."""
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+        verbose_name='читатель')
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE,
+        verbose_name='пост')
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='автор')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'),
+        ]
+
+
+class PullAuthor(models.Model):
+    """Автор, чьи посты читаются при показе ленты, а не раскладываются.
+
+    Для авторов с очень большим числом подписчиков запись в каждую
+    ленту обходится дороже, чем чтение их постов при запросе ленты.
+    """
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='pull_author',
+        on_delete=models.CASCADE,
+        verbose_name='автор')
+
+
+class AuthorStats(models.Model):
+    """Счетчики профиля, которые обновляются при записи, а не считаются.
+
+    Изменяются атомарными UPDATE в той же транзакции, что и посты и
+    подписки; команда recount_author_stats сверяет их с таблицами.
+    """
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='автор')
+    posts_count = models.PositiveIntegerField('Количество записей', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0)
+    following_count = models.PositiveIntegerField(
+        'Количество подписок', default=0)
@@ -0,0 +1,139 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorPage(Sequence):
+    """Страница курсорного паджинатора."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Паджинатор по ключу (keyset) вместо OFFSET и COUNT(*).
+
+    Порядок берется из order_by() кверисета, по умолчанию
+    ('-pub_date', '-pk'). Последнее поле должно быть уникальным.
+    Курсор хранит значения полей порядка у граничного объекта, поэтому
+    стоимость страницы не зависит от того, насколько далеко читатель
+    пролистал ленту.
+    """
+    cursor_query_param = 'cursor'
+    default_ordering = ('-pub_date', '-pk')
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(
+            ordering
+            or object_list.query.order_by
+            or self.default_ordering
+        )
+
+    def get_page(self, cursor):
+        """Вернуть страницу по курсору; некорректный курсор дает первую."""
+        try:
+            direction, values = self.decode_cursor(cursor)
+            if values is not None:
+                values = self.to_python(values)
+        except (TypeError, ValueError, ValidationError):
+            direction, values = 'n', None
+        reverse = direction == 'p'
+        queryset = self.object_list.order_by(*self._ordering(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._position_filter(values, reverse))
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+        if not items:
+            return CursorPage(items, None, None)
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return CursorPage(
+            items,
+            self.encode_cursor('n', items[-1]) if has_next else None,
+            self.encode_cursor('p', items[0]) if has_previous else None,
+        )
+
+    def encode_cursor(self, direction, obj):
+        values = [str(getattr(obj, name.lstrip('-')))
+                  for name in self.ordering]
+        raw = json.dumps([direction, values]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor))
+        except (binascii.Error, UnicodeDecodeError):
+            raise ValueError('Некорректный курсор')
+        if direction not in ('n', 'p') or len(values) != len(self.ordering):
+            raise ValueError('Некорректный курсор')
+        return direction, values
+
+    def to_python(self, values):
+        """Привести значения из курсора к типам полей порядка.
+
+        Некорректное значение вызывает ValidationError здесь, а не при
+        выполнении запроса. Поля порядка могут быть и аннотациями
+        (лента подписок сортируется по feed_date и feed_post).
+        """
+        opts = self.object_list.model._meta
+        annotations = self.object_list.query.annotations
+        converted = []
+        for name, value in zip(self.ordering, values):
+            name = name.lstrip('-')
+            if name in annotations:
+                field = annotations[name].output_field
+            elif name == 'pk':
+                field = opts.pk
+            else:
+                field = opts.get_field(name)
+            converted.append(field.to_python(value))
+        return converted
+
+    def _ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(name[1:] if name.startswith('-') else f'-{name}'
+                     for name in self.ordering)
+
+    def _position_filter(self, values, reverse):
+        """Условие «строго после курсора» для составного ключа."""
+        condition = Q()
+        for index, name in enumerate(self._ordering(reverse)):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for prev_name, prev_value in zip(self.ordering[:index], values):
+                step &= Q(**{prev_name.lstrip('-'): prev_value})
+            condition |= step
+        return condition
@@ -0,0 +1,146 @@
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from . import stats, timeline
+from .thumbnails import schedule_thumbnails
+from .cache import (GROUPS_GENERATION, bump_generation, comments_generation,
+                    profile_generation, user_generation)
+from .etags import posts_changed
+from .images import (schedule_image_deletion, schedule_variants,
+                     variant_names)
+from .loaders import invalidate_post_detail
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+# bulk_create не вызывает post_save, поэтому массовое создание постов
+# отправляет этот сигнал со списком уже сохраненных постов.
+posts_bulk_created = Signal(providing_args=['posts'])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Разложить новый пост по лентам и обновить кэш ленты."""
+    if created:
+        timeline.fan_out([instance])
+        stats.change(instance.author_id, 'posts_count', 1)
+    else:
+        invalidate_post_detail(instance.pk)
+        previous = getattr(instance, 'loaded_image', '')
+        if previous and previous != instance.image.name:
+            schedule_image_deletion(
+                [previous, *variant_names(instance.image_variants)])
+            instance.loaded_image = instance.image.name
+    if instance.image:
+        schedule_thumbnails(instance.image.name)
+        if instance.image_variants.get('source') != instance.image.name:
+            schedule_variants(instance.pk, instance.image.name)
+    Post.objects.filter(pk=instance.pk).update_search_vector()
+    posts_changed(
+        (instance.group_id, getattr(instance, 'loaded_group_id', None)),
+        (instance.author_id,))
+
+
+@receiver(posts_bulk_created)
+def posts_created_in_bulk(sender, posts, **kwargs):
+    """То же, что post_saved, но одним набором запросов на всю пачку."""
+    timeline.fan_out(posts)
+    for author_id, count in Counter(
+            post.author_id for post in posts).items():
+        stats.change(author_id, 'posts_count', count)
+    for post in posts:
+        if post.image:
+            schedule_thumbnails(post.image.name)
+            schedule_variants(post.pk, post.image.name)
+    Post.objects.filter(pk__in=[post.pk for post in posts]
+                        ).update_search_vector()
+    posts_changed({post.group_id for post in posts},
+                  {post.author_id for post in posts})
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Обновить кэш ленты после удаления поста."""
+    stats.change(instance.author_id, 'posts_count', -1)
+    invalidate_post_detail(instance.pk)
+    schedule_image_deletion(
+        [instance.image.name, *variant_names(instance.image_variants)])
+    posts_changed((instance.group_id,), (instance.author_id,))
+    bump_generation(comments_generation(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Обновить кэш ленты и карточки постов группы."""
+    if not kwargs.get('created'):
+        posts = Post.objects.filter(group=instance)
+        posts.update(version=F('version') + 1)
+        invalidate_post_detail(*posts.values_list('pk', flat=True))
+        if kwargs.get('signal') is post_save:
+            posts.update_search_vector()
+    bump_generation(GROUPS_GENERATION)
+    posts_changed((instance.pk,), Post.objects.filter(group=instance)
+                  .values_list('author_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Увеличить счетчик комментариев поста."""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            version=F('version') + 1)
+        invalidate_post_detail(instance.post_id)
+        # Счетчик комментариев виден в карточке поста в лентах.
+        posts_changed((instance.post.group_id,), (instance.post.author_id,))
+    bump_generation(comments_generation(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Уменьшить счетчик комментариев поста."""
+    # Комментарии удаляемого поста помечены в cascade_post_comments,
+    # кэш поста и лент обновит post_deleted.
+    if getattr(instance, 'deleted_with_post', False):
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        version=F('version') + 1)
+    invalidate_post_detail(instance.post_id)
+    posts_changed((instance.post.group_id,), (instance.post.author_id,))
+    bump_generation(comments_generation(instance.post_id))
+
+
+def bump_follow_generations(follow):
+    """Подписка меняет ленту читателя и счетчики обоих профилей."""
+    bump_generation(user_generation(follow.user_id))
+    bump_generation(profile_generation(follow.user.username))
+    bump_generation(profile_generation(follow.author.username))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """Заполнить ленту нового подписчика."""
+    if created:
+        timeline.follow_added(instance.user_id, instance.author_id)
+        stats.change(instance.author_id, 'followers_count', 1)
+        stats.change(instance.user_id, 'following_count', 1)
+        bump_follow_generations(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Очистить ленту отписавшегося читателя."""
+    timeline.follow_removed(instance.user_id, instance.author_id)
+    stats.change(instance.author_id, 'followers_count', -1)
+    stats.change(instance.user_id, 'following_count', -1)
+    bump_follow_generations(instance)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    """Завести пустые счетчики профиля новому пользователю."""
+    if created and not kwargs.get('raw'):
+        AuthorStats.objects.create(author_id=instance.pk)
@@ -0,0 +1,41 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Follow, Post
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects
+        .filter(**{field: OuterRef('author_id')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')), 0)
+
+
+def recount(author_ids):
+    """Создать недостающие записи и пересчитать счетчики по таблицам."""
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=author_id) for author_id in author_ids],
+        ignore_conflicts=True)
+    return AuthorStats.objects.filter(author_id__in=author_ids).update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'))
+
+
+def change(author_id, field, delta):
+    """Атомарно изменить счетчик автора на delta.
+
+    Если записи еще нет (пользователь создан через bulk_create), при
+    увеличении она создается пересчетом, который уже учитывает текущее
+    изменение. Уменьшение без записи пропускается: так бывает при
+    каскадном удалении самого пользователя.
+    """
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats.filter(**{f'{field}__gte': -delta}).update(
+            **{field: F(field) + delta})
+    elif not stats.update(**{field: F(field) + delta}):
+        recount([author_id])
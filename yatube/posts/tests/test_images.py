@@ -0,0 +1,177 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.jobs import run_pending
+from core.models import Job
+
+from ..forms import PostForm
+from ..images import (generate_variants, ingest_image, variant_formats,
+                      variant_names)
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, image_format='JPEG', mode='RGB', exif=None):
+    output = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new(mode, size, 'red').save(output, image_format, **options)
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageIngestTest(TestCase):
+    # EXIF с ориентацией 6: снимок нужно повернуть на 90° по часовой.
+    ROTATED_EXIF = (b'Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x01'
+                    b'\x01\x12\x00\x03\x00\x00\x00\x01\x00\x06\x00\x00'
+                    b'\x00\x00\x00\x00')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def open(self, upload):
+        upload.seek(0)
+        return Image.open(BytesIO(upload.read()))
+
+    def test_exif_is_applied_and_stripped(self):
+        """Поворот из EXIF применяется, а сами метаданные удаляются."""
+        upload = SimpleUploadedFile(
+            'photo.jpeg', make_image((40, 20), exif=self.ROTATED_EXIF),
+            'image/jpeg')
+        self.assertEqual(Image.open(upload).getexif().get(0x0112), 6)
+        image = self.open(ingest_image(upload))
+        self.assertEqual(image.size, (20, 40))
+        self.assertNotIn('exif', image.info)
+
+    @override_settings(IMAGE_MAX_SIZE=100)
+    def test_large_image_is_downscaled(self):
+        """Большая сторона уменьшается до IMAGE_MAX_SIZE."""
+        upload = ingest_image(SimpleUploadedFile(
+            'big.png', make_image((300, 150), 'PNG'), 'image/png'))
+        self.assertEqual(upload.name, 'big.jpg')
+        self.assertEqual(self.open(upload).size, (100, 50))
+
+    def test_transparent_image_stays_png(self):
+        """Изображение с прозрачностью сохраняется в PNG."""
+        upload = ingest_image(SimpleUploadedFile(
+            'logo.png', make_image((10, 10), 'PNG', 'RGBA'), 'image/png'))
+        self.assertEqual(upload.name, 'logo.png')
+        self.assertEqual(self.open(upload).format, 'PNG')
+
+    def test_form_rejects_broken_image(self):
+        """Файл, который Pillow не может прочитать, не проходит форму."""
+        form = PostForm(
+            data={'text': 'test'},
+            files={'image': SimpleUploadedFile(
+                'broken.jpg', b'not an image', 'image/jpeg')})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Удаленные файлы освобождают имена, а отметки о поставленных
+        # задачах миниатюр остаются в кэше.
+        cache.clear()
+
+    def create_post(self, size):
+        return Post.objects.create(
+            text='test',
+            author=User.objects.create_user(username=f'user_{size[0]}'),
+            image=SimpleUploadedFile(
+                'photo.jpg', make_image(size), 'image/jpeg'))
+
+    def test_jobs_are_queued_on_save(self):
+        """Сохранение поста с картинкой ставит миниатюры и варианты."""
+        self.create_post((400, 200))
+        self.assertEqual(
+            sorted(Job.objects.values_list('task', flat=True)),
+            ['posts.images.generate_variants',
+             'posts.thumbnails.generate_thumbnails'])
+
+    def test_variants_for_every_width(self):
+        """Варианты создаются по всем ширинам в пропорциях карточки."""
+        post = self.create_post((1200, 800))
+        generate_variants(post.pk, post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(post.version, 1)
+        for image_format in variant_formats():
+            variants = post.image_variants[image_format[1]]
+            self.assertEqual([width for width, _ in variants],
+                             list(settings.POST_IMAGE_WIDTHS))
+            with post.image.storage.open(variants[-1][1]) as file:
+                self.assertEqual(Image.open(file).size, (960, 339))
+        self.assertIn('640w', post.jpeg_srcset)
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, post.jpeg_srcset)
+
+    def test_small_image_is_not_upscaled(self):
+        """Изображение уже самой узкой ширины дает один вариант."""
+        post = self.create_post((200, 100))
+        generate_variants(post.pk, post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants['jpg'][0][0], 200)
+        self.assertEqual(len(post.image_variants['jpg']), 1)
+
+    def test_replaced_image_is_not_overwritten(self):
+        """Варианты старого изображения не записываются новому."""
+        post = self.create_post((400, 200))
+        old_name = post.image.name
+        post.image = SimpleUploadedFile(
+            'new.jpg', make_image((400, 200)), 'image/jpeg')
+        post.save()
+        generate_variants(post.pk, old_name)
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants, {})
+        self.assertEqual(post.jpeg_srcset, '')
+
+    def post_files(self, post):
+        return [post.image.name, *variant_names(post.image_variants)]
+
+    def existing(self, names):
+        return [name for name in names if default_storage.exists(name)]
+
+    def test_replaced_image_files_are_deleted(self):
+        """Замененная картинка удаляется вместе со своими вариантами."""
+        post = self.create_post((400, 200))
+        run_pending()
+        post = Post.objects.get(pk=post.pk)
+        old_files = self.post_files(post)
+        self.assertEqual(len(self.existing(old_files)), len(old_files))
+        post.image = SimpleUploadedFile(
+            'new.jpg', make_image((400, 200)), 'image/jpeg')
+        post.save()
+        run_pending()
+        post = Post.objects.get(pk=post.pk)
+        new_files = self.post_files(post)
+        self.assertEqual(self.existing(old_files), [])
+        self.assertEqual(self.existing(new_files), new_files)
+
+    def test_deleted_post_files_are_deleted(self):
+        """Файлы удаленного поста удаляются фоновой задачей."""
+        post = self.create_post((400, 200))
+        run_pending()
+        post = Post.objects.get(pk=post.pk)
+        files = self.post_files(post)
+        post.delete()
+        self.assertEqual(len(self.existing(files)), len(files))
+        run_pending()
+        self.assertEqual(self.existing(files), [])
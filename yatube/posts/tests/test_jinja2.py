@@ -0,0 +1,72 @@
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import engines
+from django.test import TestCase, override_settings
+from jinja2 import FileSystemBytecodeCache
+
+from ..models import Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class Jinja2FeedTest(TestCase):
+    GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+           b'\x01\x00\x80\x00\x00\x00\x00\x00'
+           b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+           b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+           b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+           b'\x0A\x00\x3B')
+    URLS = ('/', '/?page=2', '/group/test/', '/author/', '/follow/')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Тест', slug='test', description='Строка\nстрока')
+        for number in range(settings.ITEMS_PER_PAGE + 2):
+            Post.objects.create(
+                text=f'<b>Пост {number}</b>\nвторая строка',
+                author=cls.author,
+                group=group if number % 2 else None)
+        Post.objects.create(
+            text='С картинкой', author=cls.author,
+            image=SimpleUploadedFile('small.gif', cls.GIF, 'image/gif'))
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def render(self, url, engine):
+        cache.clear()
+        with override_settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return re.sub(r'\s+', ' ', response.content.decode()).replace(
+            '> <', '><')
+
+    def test_same_html_as_django_templates(self):
+        """Ленты на Jinja2 совпадают с лентами на шаблонах Django."""
+        for client_user in (None, self.reader, self.author):
+            if client_user:
+                self.client.force_login(client_user)
+            for url in self.URLS:
+                if url == '/follow/' and client_user is None:
+                    continue
+                with self.subTest(url=url, user=client_user):
+                    self.assertEqual(self.render(url, 'jinja2'),
+                                     self.render(url, 'django'))
+
+    def test_bytecode_cache(self):
+        """Скомпилированные шаблоны сохраняются в байткод-кэш."""
+        env = engines['jinja2'].env
+        self.assertIsInstance(env.bytecode_cache, FileSystemBytecodeCache)
@@ -1,7 +1,11 @@
-from django.db import IntegrityError
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Comment, Follow, Group, Post, User
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -54,3 +58,103 @@ class PostModelTest(TestCase):
             'user': self.user,
             'author': self.user2,
         })
+
+    def test_comment_count_follows_comments(self):
+        """Проверить, что счетчик комментариев обновляется."""
+        post = Post.objects.create(text=self.SAMPLE_TEXT, author=self.user)
+        comment = Comment.objects.create(
+            text=self.SAMPLE_TEXT, author=self.user, post=post)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_post_delete_skips_comment_counter(self):
+        """Каскадное удаление комментариев не обновляет удаляемый пост."""
+        post = Post.objects.create(text=self.SAMPLE_TEXT, author=self.user)
+        Comment.objects.bulk_create(
+            Comment(text=self.SAMPLE_TEXT, author=self.user, post=post)
+            for _ in range(5))
+        with CaptureQueriesContext(connection) as context:
+            post.delete()
+        self.assertEqual([query['sql'] for query in context.captured_queries
+                          if query['sql'].startswith('UPDATE "post"')], [])
+        self.assertFalse(Comment.objects.filter(post=post.pk).exists())
+        # Отметка снимается: комментарии других постов считаются как прежде.
+        other = Post.objects.create(text=self.SAMPLE_TEXT, author=self.user)
+        Comment.objects.create(
+            text=self.SAMPLE_TEXT, author=self.user, post=other).delete()
+        other.refresh_from_db()
+        self.assertEqual(other.comment_count, 0)
+
+    def test_rolled_back_post_delete_keeps_counting(self):
+        """После отката удаления поста его комментарии считаются как прежде."""
+        post = Post.objects.create(text=self.SAMPLE_TEXT, author=self.user)
+        for _ in range(2):
+            Comment.objects.create(
+                text=self.SAMPLE_TEXT, author=self.user, post=post)
+        post_id = post.pk
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            post.delete()
+            raise RuntimeError
+        Comment.objects.filter(post=post_id).first().delete()
+        self.assertEqual(Post.objects.get(pk=post_id).comment_count, 1)
+
+    def test_post_save_keeps_comment_count(self):
+        """Сохранение устаревшего экземпляра не затирает счетчик."""
+        post = Post.objects.create(text=self.SAMPLE_TEXT, author=self.user)
+        Comment.objects.create(
+            text=self.SAMPLE_TEXT, author=self.user, post=post)
+        post.text = self.SAMPLE_TEXT * 2
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+    def test_recount_comments_command(self):
+        """Команда recount_comments чинит разошедшиеся счетчики."""
+        Post.objects.filter(pk=self.post.pk).update(comment_count=42)
+        call_command('recount_comments', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+
+class AuthorStatsTest(TestCase):
+    SAMPLE_TEXT = 'test'
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+
+    def counts(self, user):
+        stats = AuthorStats.objects.get(author=user)
+        return (stats.posts_count, stats.followers_count,
+                stats.following_count)
+
+    def test_counters_follow_writes(self):
+        """Счетчики меняются вместе с постами и подписками."""
+        post = Post.objects.create(text=self.SAMPLE_TEXT, author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counts(self.author), (1, 1, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 1))
+        post.delete()
+        follow.delete()
+        self.assertEqual(self.counts(self.author), (0, 0, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 0))
+
+    def test_missing_stats_are_recounted(self):
+        """Пользователь без записи счетчиков получает ее при первой записи."""
+        AuthorStats.objects.filter(author=self.author).delete()
+        Post.objects.create(text=self.SAMPLE_TEXT, author=self.author)
+        self.assertEqual(self.counts(self.author), (1, 0, 0))
+
+    def test_recount_author_stats_command(self):
+        """Команда recount_author_stats чинит разошедшиеся счетчики."""
+        Post.objects.create(text=self.SAMPLE_TEXT, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.update(
+            posts_count=42, followers_count=42, following_count=42)
+        AuthorStats.objects.filter(author=self.reader).delete()
+        call_command('recount_author_stats', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.counts(self.author), (1, 1, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 1))
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from ..models import Comment, Follow, Group, Post, User
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    SAMPLE_TEXT = 'test'
+    POSTS_COUNT = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title=cls.SAMPLE_TEXT,
+            description=cls.SAMPLE_TEXT,
+            slug=cls.SAMPLE_TEXT,
+        )
+        for number in range(cls.POSTS_COUNT):
+            author = User.objects.create_user(username=f'author{number}')
+            post = Post.objects.create(
+                text=cls.SAMPLE_TEXT, author=author, group=cls.group)
+            Comment.objects.create(
+                post=post, author=cls.reader, text=cls.SAMPLE_TEXT)
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.author = author
+        cls.post = post
+        for number in range(cls.POSTS_COUNT):
+            commenter = User.objects.create_user(username=f'commenter{number}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=cls.SAMPLE_TEXT)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def test_pages_query_budget(self):
+        """Число запросов страниц не растет с числом постов."""
+        url_budget = {
+            reverse('index'): 3,
+            reverse('group', args=[self.group.slug]): 4,
+            reverse('profile', args=[self.author.username]): 5,
+            reverse('post', args=[self.author.username, self.post.pk]): 5,
+            reverse('follow_index'): 4,
+        }
+        for url, budget in url_budget.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(url, budget, self.authorized_client)
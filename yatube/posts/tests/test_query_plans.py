@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from rest_framework.test import APIClient
+
+from benchmarks.seed import seed
+from core.testing import QueryPlanMixin
+from ..models import Comment, Follow, Group
+
+
+class QueryPlanTest(QueryPlanMixin, TestCase):
+    # Поиск не проверяется: сортировка найденных постов по ts_rank
+    # неизбежна и идет только по совпавшим строкам.
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=30, groups=4, posts=300, comments=600, follows=60)
+        cls.post = Comment.objects.select_related('post__author').first().post
+        cls.group = Group.objects.exclude(posts=None).first()
+        cls.reader = Follow.objects.select_related('user').first().user
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_pages_use_indexes(self):
+        """Запросы страниц обходятся без Seq Scan и сортировки."""
+        author = self.post.author.username
+        urls = (
+            '/',
+            f'/group/{self.group.slug}/',
+            f'/{author}/',
+            f'/{author}/{self.post.pk}/',
+            '/follow/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIndexedPlans(url, self.authorized_client)
+
+    def test_api_uses_indexes(self):
+        """Запросы API обходятся без Seq Scan и сортировки."""
+        urls = (
+            '/api/v1/posts/?limit=20&offset=40',
+            f'/api/v1/posts/{self.post.pk}/',
+            f'/api/v1/posts/{self.post.pk}/comments/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIndexedPlans(url, APIClient())
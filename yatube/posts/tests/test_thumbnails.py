@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from sorl.thumbnail import default
+
+from ..cards import attach_cards
+from ..models import Post, User
+from ..thumbnails import generate_thumbnails, prefetch_thumbnails
+
+
+class ThumbnailTest(TestCase):
+    GEOMETRY, OPTIONS = settings.POST_THUMBNAILS[0]
+
+    GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+           b'\x01\x00\x80\x00\x00\x00\x00\x00'
+           b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+           b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+           b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+           b'\x0A\x00\x3B')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='test',
+            author=User.objects.create_user(username='test_user'),
+            image=SimpleUploadedFile(
+                name='small.gif', content=self.GIF,
+                content_type='image/gif'),
+        )
+
+    def get_thumbnail(self):
+        return default.backend.get_thumbnail(
+            self.post.image, self.GEOMETRY, **self.OPTIONS)
+
+    def test_missing_thumbnail_falls_back_to_source(self):
+        """Пока миниатюры нет, шаблон получает исходное изображение."""
+        self.assertEqual(self.get_thumbnail().name, self.post.image.name)
+
+    def test_pregenerated_thumbnail_is_used(self):
+        """Созданная заранее миниатюра находится без генерации."""
+        generate_thumbnails(self.post.image.name)
+        thumbnail = self.get_thumbnail()
+        self.assertNotEqual(thumbnail.name, self.post.image.name)
+        self.assertEqual(thumbnail.x, 960)
+
+    def test_card_rendered_on_miss_is_replaced(self):
+        """После создания миниатюр карточка перестает ссылаться на исходник."""
+        attach_cards([self.post])
+        self.assertIn(self.post.image.name, self.post.card)
+        generate_thumbnails(self.post.image.name)
+        post = Post.objects.get(pk=self.post.pk)
+        attach_cards([post])
+        self.assertGreater(post.version, self.post.version)
+        self.assertNotIn(self.post.image.name, post.card)
+
+
+class ThumbnailPrefetchTest(TestCase):
+    IMAGES = 10
+    GIF = ThumbnailTest.GIF
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        author = User.objects.create_user(username='test_user')
+        self.posts = [
+            Post.objects.create(
+                text='test', author=author,
+                image=SimpleUploadedFile(
+                    name='small.gif', content=self.GIF,
+                    content_type='image/gif'))
+            for _ in range(self.IMAGES)
+        ]
+        for post in self.posts:
+            generate_thumbnails(post.image.name)
+        cache.clear()
+
+    def kvstore_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return [query for query in context.captured_queries
+                if 'thumbnail_kvstore' in query['sql']]
+
+    def test_page_of_cards_costs_one_lookup(self):
+        """Карточки страницы ищут все миниатюры одним запросом."""
+        self.assertEqual(
+            len(self.kvstore_queries(lambda: attach_cards(self.posts))), 1)
+        for post in self.posts:
+            self.assertIn('cache/', post.card)
+        cache.delete_many([f'post_card:{post.pk}:{post.version}'
+                           for post in self.posts])
+        self.assertEqual(
+            self.kvstore_queries(lambda: attach_cards(self.posts)), [])
+
+    def test_prefetch_reports_missing_thumbnails(self):
+        """Изображение без миниатюры находится как None."""
+        post = Post.objects.create(
+            text='test', author=self.posts[0].author,
+            image=SimpleUploadedFile(
+                name='new.gif', content=self.GIF, content_type='image/gif'))
+        with prefetch_thumbnails([self.posts[0].image, post.image]) as found:
+            self.assertEqual(sorted(value is None
+                                    for value in found.values()),
+                             [False, True])
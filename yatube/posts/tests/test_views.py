@@ -1,3 +1,4 @@
+import base64
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -6,10 +7,12 @@ from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from rest_framework.test import APIClient
 
-from ..models import Comment, Follow, Group, Post, User
+from ..loaders import get_post_detail
+from ..models import Comment, Follow, Group, Post, PullAuthor, User
 
 
 class PostPagesTest(TestCase):
@@ -267,17 +270,52 @@ class PostPagesTest(TestCase):
         page = response.context.get(self.PAGE_VAR)
         self.assertEqual(len(page), 0)
 
+    def test_timeline_follows_posts_and_unfollow(self):
+        """Новые посты попадают в ленту подписчика, отписка их убирает."""
+        Follow.objects.create(user=self.user1, author=self.user)
+        new_post = Post.objects.create(text=self.CACHE_POST, author=self.user)
+        page = self.authorized_client1.get(
+            reverse(self.FOLLOW_INDEX_NAME)).context[self.PAGE_VAR]
+        self.assertEqual(page[0], new_post)
+        self.assertEqual(len(page), self.user.posts.count())
+
+        self.authorized_client1.get(
+            reverse(self.PROFILE_UNFOLLOW_NAME, args=[self.user.username]))
+        page = self.authorized_client1.get(
+            reverse(self.FOLLOW_INDEX_NAME)).context[self.PAGE_VAR]
+        self.assertEqual(len(page), 0)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_timeline_reads_popular_author_on_demand(self):
+        """Посты популярного автора читаются при показе ленты."""
+        Follow.objects.create(user=self.user1, author=self.user)
+        Follow.objects.create(user=self.user2, author=self.user)
+        self.assertTrue(
+            PullAuthor.objects.filter(author=self.user).exists())
+        new_post = Post.objects.create(text=self.CACHE_POST, author=self.user)
+        page = self.authorized_client2.get(
+            reverse(self.FOLLOW_INDEX_NAME)).context[self.PAGE_VAR]
+        self.assertEqual(page[0], new_post)
+        self.assertEqual(len(page), self.user.posts.count())
+
     def test_cache(self):
         """Проверка кэширования главной страницы."""
         self.authorized_client.get(reverse(self.INDEX_NAME))
+        Post.objects.filter(pk=self.post.pk).update(text=self.CACHE_POST)
+        response = self.authorized_client.get(reverse(self.INDEX_NAME))
+        self.assertNotContains(response, self.CACHE_POST)
+        cache.clear()
+        response = self.authorized_client.get(reverse(self.INDEX_NAME))
+        self.assertContains(response, self.CACHE_POST)
+
+    def test_cache_invalidated_by_new_post(self):
+        """Новый пост сразу виден на закэшированной главной странице."""
+        self.authorized_client.get(reverse(self.INDEX_NAME))
         Post.objects.create(
             text=self.CACHE_POST,
             author=self.user,
         )
         response = self.authorized_client.get(reverse(self.INDEX_NAME))
-        self.assertNotContains(response, self.CACHE_POST)
-        cache.clear()
-        response = self.authorized_client.get(reverse(self.INDEX_NAME))
         self.assertContains(response, self.CACHE_POST)
 
 
@@ -286,9 +324,11 @@ class PaginatorViewsTest(TestCase):
     INDEX_NAME = 'index'
     GROUP_NAME = 'group'
     PROFILE_NAME = 'profile'
+    FOLLOW_NAME = 'follow_index'
 
     SAMPLE_TEXT = 'test'
     USERNAME = 'test_user'
+    FOLLOWER = 'follower'
 
     PAGE_VAR = 'page'
 
@@ -325,3 +365,367 @@ class PaginatorViewsTest(TestCase):
                 response = self.guest_client.get(url)
                 self.assertEqual(
                     len(response.context[self.PAGE_VAR].object_list), value)
+
+    def follower_client(self):
+        follower = User.objects.create_user(username=self.FOLLOWER)
+        Follow.objects.create(user=follower, author=self.user)
+        client = Client()
+        client.force_login(follower)
+        return client
+
+    def test_cursor_pages(self):
+        """Проверить навигацию по курсорам вперед и назад."""
+        pages = (
+            (self.guest_client, reverse(self.INDEX_NAME)),
+            # Лента подписок сортируется по аннотациям записей ленты.
+            (self.follower_client(), reverse(self.FOLLOW_NAME)),
+        )
+        for client, url in pages:
+            with self.subTest(url=url):
+                first_page = client.get(url).context[self.PAGE_VAR]
+                self.assertEqual(len(first_page), 10)
+                self.assertFalse(first_page.has_previous())
+
+                second_page = client.get(
+                    url, {'cursor': first_page.next_cursor}
+                ).context[self.PAGE_VAR]
+                self.assertEqual(len(second_page), 3)
+                self.assertFalse(second_page.has_next())
+                self.assertTrue(
+                    set(first_page).isdisjoint(second_page.object_list))
+
+                back_page = client.get(
+                    url, {'cursor': second_page.previous_cursor}
+                ).context[self.PAGE_VAR]
+                self.assertEqual(
+                    back_page.object_list, first_page.object_list)
+
+    def test_broken_cursor_gives_first_page(self):
+        """Курсор с некорректными значениями дает первую страницу."""
+        post = Post.objects.first()
+        pages = (
+            (self.guest_client, reverse(self.INDEX_NAME)),
+            (self.guest_client,
+             reverse('post', args=[self.USERNAME, post.pk])),
+            (self.follower_client(), reverse(self.FOLLOW_NAME)),
+        )
+        cursors = (
+            base64.urlsafe_b64encode(b'["n", ["x", "y"]]').decode(),
+            base64.urlsafe_b64encode(b'["p", [[1], {"a": 1}]]').decode(),
+            'not-a-cursor',
+        )
+        for client, url in pages:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class PostCardCacheTest(TestCase):
+    SAMPLE_TEXT = 'test'
+    NEW_TEXT = 'new text'
+    USERNAME = 'test_user'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=self.USERNAME)
+        self.group = Group.objects.create(
+            title=self.SAMPLE_TEXT,
+            description=self.SAMPLE_TEXT,
+            slug=self.SAMPLE_TEXT,
+        )
+        self.post = Post.objects.create(
+            text=self.SAMPLE_TEXT, author=self.user, group=self.group)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.profile_url = reverse('profile', args=[self.USERNAME])
+        cache.clear()
+
+    def rename_group(self):
+        self.group.title = self.NEW_TEXT
+        self.group.save()
+
+    def test_card_served_from_cache(self):
+        """Карточка поста берется из кэша, пока версия не изменилась."""
+        self.authorized_client.get(self.profile_url)
+        Post.objects.filter(pk=self.post.pk).update(text=self.NEW_TEXT)
+        response = self.authorized_client.get(self.profile_url)
+        self.assertNotContains(response, self.NEW_TEXT)
+
+    def test_card_invalidated(self):
+        """Правка поста, комментарий и смена группы обновляют карточку."""
+        changes = {
+            'edit': lambda: self.authorized_client.post(
+                reverse('post_edit', args=[self.USERNAME, self.post.pk]),
+                {'text': self.NEW_TEXT, 'group': self.group.pk}),
+            'comment': lambda: Comment.objects.create(
+                post=self.post, author=self.user, text=self.SAMPLE_TEXT),
+            'group': self.rename_group,
+        }
+        expected = {
+            'edit': self.NEW_TEXT,
+            'comment': 'Комментариев: 1',
+            'group': f'#{self.NEW_TEXT}',
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                self.authorized_client.get(self.profile_url)
+                change()
+                response = self.authorized_client.get(self.profile_url)
+                self.assertContains(response, expected[name])
+
+
+class SearchViewTest(TestCase):
+    USERNAME = 'test_user'
+    GROUP_TITLE = 'Домашние животные'
+    MATCHING_TEXT = 'Котики любят молоко'
+    OTHER_TEXT = 'Погода сегодня солнечная'
+    SEARCH_URL = '/search/'
+    API_URL = '/api/v1/posts/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=cls.USERNAME)
+        cls.group = Group.objects.create(
+            title=cls.GROUP_TITLE,
+            description=cls.GROUP_TITLE,
+            slug='pets',
+        )
+        cls.matching = Post.objects.create(
+            text=cls.MATCHING_TEXT, author=cls.user)
+        cls.in_group = Post.objects.create(
+            text=cls.OTHER_TEXT, author=cls.user, group=cls.group)
+        cls.other = Post.objects.create(text=cls.OTHER_TEXT, author=cls.user)
+
+    def search(self, query):
+        response = self.client.get(self.SEARCH_URL, {'q': query})
+        return list(response.context['page'])
+
+    def test_search_by_word_form(self):
+        """Поиск находит пост по другой форме слова."""
+        self.assertEqual(self.search('котик'), [self.matching])
+
+    def test_search_by_group_title(self):
+        """Название группы участвует в поиске с меньшим весом."""
+        self.assertEqual(self.search('животное'), [self.in_group])
+
+    def test_search_vector_updated_on_change(self):
+        """Правка поста и переименование группы обновляют индекс."""
+        self.other.text = 'Собаки тоже любят молоко'
+        self.other.save()
+        self.group.title = 'Собаки'
+        self.group.save()
+        self.assertEqual(
+            self.search('собака'), [self.other, self.in_group])
+        self.assertEqual(self.search('животное'), [])
+
+    def test_api_search(self):
+        """Параметр search в API фильтрует посты по полнотекстовому индексу."""
+        response = self.client.get(self.API_URL, {'search': 'молока'})
+        self.assertEqual(
+            [post['id'] for post in response.json()], [self.matching.pk])
+
+
+class ConditionalGetTest(TestCase):
+    USERNAME = 'test_user'
+    AUTHOR = 'author'
+    SAMPLE_TEXT = 'test'
+    INDEX_URL = '/'
+    FOLLOW_URL = '/follow/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=cls.USERNAME)
+        cls.author = User.objects.create_user(username=cls.AUTHOR)
+        Post.objects.create(text=cls.SAMPLE_TEXT, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_feed_not_modified(self):
+        """Неизмененная лента отдается как 304 без запросов к базе."""
+        etag = self.client.get(self.INDEX_URL)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.INDEX_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changes_refresh_etag(self):
+        """Новый пост и подписка меняют ETag соответствующих страниц."""
+        changes = {
+            self.INDEX_URL: lambda: Post.objects.create(
+                text=self.SAMPLE_TEXT, author=self.author),
+            self.FOLLOW_URL: lambda: Follow.objects.create(
+                user=self.user, author=self.author),
+            f'/{self.AUTHOR}/': lambda: Follow.objects.create(
+                user=self.author, author=self.user),
+        }
+        for url, change in changes.items():
+            with self.subTest(url=url):
+                etag = self.authorized_client.get(url)['ETag']
+                change()
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_profile_and_follow_etags_are_per_author(self):
+        """Пост чужого автора не меняет ETag профиля и ленты подписок."""
+        Follow.objects.create(user=self.user, author=self.author)
+        other = User.objects.create_user(username='other')
+        urls = (f'/{self.AUTHOR}/', self.FOLLOW_URL)
+        etags = {url: self.authorized_client.get(url)['ETag']
+                 for url in urls}
+        Post.objects.create(text=self.SAMPLE_TEXT, author=other)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+        post = Post.objects.get(author=self.author)
+        post.text = self.SAMPLE_TEXT * 2
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_pull_author_post_refreshes_follow_feed(self):
+        """Пост PullAuthor меняет ETag ленты его подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        PullAuthor.objects.create(author=self.author)
+        etag = self.authorized_client.get(self.FOLLOW_URL)['ETag']
+        Post.objects.create(text=self.SAMPLE_TEXT, author=self.author)
+        response = self.authorized_client.get(
+            self.FOLLOW_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_group_etag_follows_group_posts(self):
+        """ETag группы меняется только вместе с постами этой группы."""
+        group, other = (
+            Group.objects.create(title=slug, description=slug, slug=slug)
+            for slug in ('first', 'second'))
+        post = Post.objects.create(
+            text=self.SAMPLE_TEXT, author=self.author, group=group)
+        url = reverse('group', args=[group.slug])
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(
+            text=self.SAMPLE_TEXT, author=self.author, group=other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        # Перенесенный пост пропадает со страницы прежней группы.
+        post = Post.objects.get(pk=post.pk)
+        post.group = other
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTest(TestCase):
+    USERNAME = 'test_user'
+    COMMENTS_COUNT = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=cls.USERNAME)
+        cls.post = Post.objects.create(text='test', author=cls.user)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'comment {number}')
+            for number in range(cls.COMMENTS_COUNT)
+        ]
+        cls.post_url = reverse('post', args=[cls.USERNAME, cls.post.pk])
+
+    def test_post_page_loads_comments_incrementally(self):
+        """Комментарии подгружаются порциями по порядку написания."""
+        page = self.client.get(self.post_url).context['comments']
+        loaded = list(page)
+        while page.has_next():
+            response = self.client.get(
+                self.post_url, {'cursor': page.next_cursor},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            self.assertTemplateNotUsed(response, 'post.html')
+            page = response.context['comments']
+            loaded.extend(page)
+        self.assertEqual(loaded, self.comments)
+
+    def test_api_comments_cursor_pagination(self):
+        """API отдает комментарии страницами с курсором next."""
+        url = f'/api/v1/posts/{self.post.pk}/comments/'
+        loaded = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            loaded.extend(comment['id'] for comment in data['results'])
+            url = data['next']
+        self.assertEqual(loaded, [comment.pk for comment in self.comments])
+
+
+class PostDetailLoaderTest(TestCase):
+    USERNAME = 'test_user'
+    SAMPLE_TEXT = 'test'
+    NEW_TEXT = 'new text'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=cls.USERNAME)
+        cls.post = Post.objects.create(text=cls.SAMPLE_TEXT, author=cls.user)
+        cls.post_url = reverse('post', args=[cls.USERNAME, cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_detail_cached(self):
+        """Повторный показ поста берет его из кэша без запроса."""
+        get_post_detail(self.post.pk)
+        with self.assertNumQueries(0):
+            post = get_post_detail(self.post.pk)
+        self.assertEqual(post.author, self.user)
+
+    def test_detail_invalidated(self):
+        """Правка на сайте и через API, комментарий обновляют пост."""
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+        changes = {
+            'post_edit': lambda text: self.authorized_client.post(
+                reverse('post_edit', args=[self.USERNAME, self.post.pk]),
+                {'text': text}),
+            'api': lambda text: api_client.patch(
+                f'/api/v1/posts/{self.post.pk}/', {'text': text}),
+            'comment': lambda text: Comment.objects.create(
+                post=self.post, author=self.user, text=text),
+        }
+        expected = {
+            'post_edit': f'{self.NEW_TEXT} post_edit',
+            'api': f'{self.NEW_TEXT} api',
+            'comment': 'Комментариев: 1',
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                self.authorized_client.get(self.post_url)
+                change(f'{self.NEW_TEXT} {name}')
+                response = self.authorized_client.get(self.post_url)
+                self.assertContains(response, expected[name])
+
+    def test_wrong_author_not_found(self):
+        """Пост под чужим или несуществующим автором не найден."""
+        other = User.objects.create_user(username='other')
+        urls = (
+            reverse('post', args=[other.username, self.post.pk]),
+            reverse('post', args=['nobody', self.post.pk]),
+            reverse('profile', args=['nobody']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,143 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.jobs import enqueue
+from .etags import posts_changed
+from .loaders import invalidate_post_detail
+from .models import Post
+
+_prefetched = threading.local()
+
+
+def generate_thumbnails(name):
+    """Создать все миниатюры POST_THUMBNAILS для изображения.
+
+    Карточки, отрисованные до этого, ссылаются на исходное изображение,
+    поэтому версии постов с ним увеличиваются и кэш лент устаревает.
+    """
+    backend = ThumbnailBackend()
+    for geometry, options in settings.POST_THUMBNAILS:
+        backend.get_thumbnail(name, geometry, **options)
+    posts = Post.objects.filter(image=name)
+    rows = list(posts.values_list('pk', 'group_id', 'author_id'))
+    if rows:
+        posts.update(version=F('version') + 1)
+        invalidate_post_detail(*(pk for pk, _, _ in rows))
+        posts_changed({group_id for _, group_id, _ in rows},
+                      {author_id for _, _, author_id in rows})
+
+
+def schedule_thumbnails(name):
+    """Поставить создание миниатюр в очередь фоновых задач.
+
+    Повторные промахи при отрисовке не пишут в базу чаще, чем раз в
+    THUMBNAIL_SCHEDULE_TIMEOUT.
+    """
+    if cache.add(f'thumbnails-scheduled:{name}', True,
+                 settings.THUMBNAIL_SCHEDULE_TIMEOUT):
+        enqueue(generate_thumbnails, name, key=f'thumbnails:{name}')
+
+
+class BatchedKVStore(KVStore):
+    """cached_db-хранилище sorl-thumbnail с пакетным чтением."""
+
+    def get_many(self, image_files):
+        """Найти несколько изображений за одно обращение.
+
+        Один get_many к кэшу и не больше одного запроса к базе за промахи
+        кэша. Возвращает словарь {ключ изображения: ImageFile или None}.
+        """
+        raw_keys = {add_prefix(image_file.key): image_file.key
+                    for image_file in image_files}
+        values = self.cache.get_many(list(raw_keys))
+        missing = [key for key in raw_keys if key not in values]
+        if missing:
+            found = dict(KVStoreModel.objects
+                         .filter(key__in=missing)
+                         .values_list('key', 'value'))
+            loaded = {key: found.get(key, EMPTY_VALUE) for key in missing}
+            self.cache.set_many(
+                loaded, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(loaded)
+        return {
+            key: (deserialize_image_file(values[raw_key])
+                  if values[raw_key] and values[raw_key] != EMPTY_VALUE
+                  else None)
+            for raw_key, key in raw_keys.items()
+        }
+
+
+@contextmanager
+def prefetch_thumbnails(images):
+    """Заранее найти миниатюры POST_THUMBNAILS для всех изображений.
+
+    Внутри блока {% thumbnail %} и thumbnail() в Jinja2 берут
+    метаданные из найденного, а не идут в хранилище за каждой
+    картинкой: страница из десяти карточек стоит одного обращения.
+    """
+    backend = default.backend
+    thumbnails = [
+        ImageFile(backend.thumbnail_name(
+            ImageFile(image), geometry, options), default.storage)
+        for image in images if image
+        for geometry, options in settings.POST_THUMBNAILS
+    ]
+    found = {}
+    if thumbnails and hasattr(default.kvstore, 'get_many'):
+        found = default.kvstore.get_many(thumbnails)
+    _prefetched.thumbnails = found
+    try:
+        yield found
+    finally:
+        _prefetched.thumbnails = {}
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который при отрисовке только ищет миниатюру.
+
+    Если миниатюры еще нет, отдается исходное изображение, а создание
+    миниатюр ставится в очередь задач, так что запрос не ждет Pillow.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        thumbnail = ImageFile(
+            self.thumbnail_name(source, geometry_string, options),
+            default.storage)
+        prefetched = getattr(_prefetched, 'thumbnails', {})
+        if thumbnail.key in prefetched:
+            cached = prefetched[thumbnail.key]
+        else:
+            cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        schedule_thumbnails(source.name)
+        return source
+
+    def thumbnail_name(self, source, geometry_string, options):
+        """Имя миниатюры с теми же опциями, что у ThumbnailBackend."""
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return self._get_thumbnail_filename(source, geometry_string, options)
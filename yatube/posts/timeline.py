@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import Follow, Post, PullAuthor, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out(posts):
+    """Разложить новые посты по лентам подписчиков их авторов."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    pull_ids = set(PullAuthor.objects
+                   .filter(author__in=by_author)
+                   .values_list('author_id', flat=True))
+    for author_id, author_posts in by_author.items():
+        if author_id in pull_ids:
+            continue
+        followers = (Follow.objects
+                     .filter(author_id=author_id)
+                     .values_list('user_id', flat=True))
+        _insert([
+            TimelineEntry(user_id=user_id, post_id=post.pk,
+                          author_id=author_id, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+            for post in author_posts
+        ])
+
+
+def follow_added(user_id, author_id):
+    """Заполнить ленту подписчика свежими постами автора."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = Follow.objects.filter(author_id=author_id)
+    if followers[:limit + 1].count() > limit:
+        PullAuthor.objects.get_or_create(author_id=author_id)
+        return
+    if PullAuthor.objects.filter(author_id=author_id).exists():
+        return
+    recent = (Post.objects
+              .filter(author_id=author_id)
+              .order_by('-pub_date', '-pk')
+              .values_list('pk', 'pub_date')
+              [:settings.TIMELINE_BACKFILL_SIZE])
+    _insert([
+        TimelineEntry(user_id=user_id, post_id=post_id,
+                      author_id=author_id, pub_date=pub_date)
+        for post_id, pub_date in recent
+    ])
+
+
+def follow_removed(user_id, author_id):
+    """Убрать посты автора из ленты отписавшегося читателя."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def follow_posts(user):
+    """Кверисет ленты подписок пользователя.
+
+    Обычно это один диапазонный проход по индексу ленты читателя. Посты
+    PullAuthor, на которых он подписан, добавляются при чтении.
+    """
+    pull_ids = list(PullAuthor.objects
+                    .filter(author__following__user=user)
+                    .values_list('author_id', flat=True))
+    if pull_ids:
+        entries = TimelineEntry.objects.filter(user=user).values('post')
+        return (Post.objects
+                .filter(Q(pk__in=entries) | Q(author__in=pull_ids))
+                .order_by('-pub_date', '-pk'))
+    return (Post.objects
+            .filter(timeline_entries__user=user)
+            .annotate(feed_date=F('timeline_entries__pub_date'),
+                      feed_post=F('timeline_entries__post'))
+            .order_by('-feed_date', '-feed_post'))
@@ -1,75 +1,133 @@
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 
+from . import timeline
+from .cache import cache_page_versioned
+from .cards import attach_cards
+from .etags import feed_etag, follow_etag, group_etag, profile_etag
 from .forms import CommentForm, PostForm
+from .loaders import get_post_detail, load_author
 from .models import Follow, Group, Post, User
+from .pagination import CursorPaginator
 
 
 def paginator_page(request, objects, items_per_page, paginator_class):
-    """Функция для возвращения страницы Пагинатора."""
-    paginator = paginator_class(objects, items_per_page)
+    """Функция для возвращения страницы Пагинатора.
+
+    Явный номер страницы (?page=) по-прежнему обслуживает обычный
+    Paginator, чтобы старые ссылки продолжали работать.
+    """
     page_number = request.GET.get('page')
+    if page_number is not None:
+        paginator_class = Paginator
+    paginator = paginator_class(objects, items_per_page)
+    if isinstance(paginator, CursorPaginator):
+        return paginator.get_page(
+            request.GET.get(paginator.cursor_query_param))
     page = paginator.get_page(page_number)
     return page
 
 
-@cache_page(20, key_prefix='index_page')
+@condition(etag_func=feed_etag)
+@cache_page_versioned(settings.INDEX_CACHE_TIMEOUT, key_prefix='index_page')
 def index(request):
     """View функция для главной страницы."""
-    post_list = Post.objects.select_related('group').all()
+    post_list = Post.objects.select_related('author', 'group').all()
     page = paginator_page(
-        request, post_list, settings.ITEMS_PER_PAGE, Paginator)
-    return render(request, 'index.html', {'page': page, })
+        request, post_list, settings.ITEMS_PER_PAGE, CursorPaginator)
+    attach_cards(page)
+    return render(request, 'index.html', {'page': page, },
+                  using=settings.FEED_TEMPLATE_ENGINE)
 
 
+@condition(etag_func=group_etag)
 def group_posts(request, slug):
     """View функция для страницы сообществ."""
     group = get_object_or_404(Group, slug=slug)
-    posts_list = Post.objects.filter(group=group)
+    posts_list = Post.objects.select_related('author', 'group').filter(
+        group=group)
     page = paginator_page(
-        request, posts_list, settings.ITEMS_PER_PAGE, Paginator)
+        request, posts_list, settings.ITEMS_PER_PAGE, CursorPaginator)
+    attach_cards(page)
     context = {
         'group': group,
         'page': page,
 
     }
-    return render(request, 'group.html', context)
+    return render(request, 'group.html', context,
+                  using=settings.FEED_TEMPLATE_ENGINE)
+
+
+def search(request):
+    """View функция для полнотекстового поиска по постам."""
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.none()
+    if query:
+        posts = Post.objects.search(query).select_related('author', 'group')
+    # Результаты упорядочены по релевантности, поэтому курсор по ключу
+    # здесь не подходит — используется обычный Paginator.
+    page = paginator_page(request, posts, settings.ITEMS_PER_PAGE, Paginator)
+    attach_cards(page)
+    context = {
+        'query': query,
+        'page': page,
+        'page_params': '&' + urlencode({'q': query}),
+    }
+    return render(request, 'search.html', context)
 
 
+@condition(etag_func=profile_etag)
 def profile(request, username):
     """View функция для просмотра профиля автора."""
-    author = User.objects.prefetch_related('posts').get(username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, settings.ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = load_author(username)
+    posts = author.posts.select_related('author', 'group')
+    page = paginator_page(
+        request, posts, settings.ITEMS_PER_PAGE, CursorPaginator)
+    attach_cards(page)
 
     context = {
         'author': author,
         'page': page,
-        'posts': posts
     }
     if request.user.is_authenticated:
-        author = get_object_or_404(User, username=username)
         following = Follow.objects.filter(user=request.user,
                                           author=author).exists()
         context['following'] = following
-    return render(request, 'profile.html', context)
+    return render(request, 'profile.html', context,
+                  using=settings.FEED_TEMPLATE_ENGINE)
 
 
 def post_view(request, username, post_id):
     """View функция для просмотра поста."""
-    author = User.objects.prefetch_related('posts').get(username=username)
-    post = author.posts.get(id=post_id)
+    author = load_author(username)
+    try:
+        post = get_post_detail(post_id)
+    except Post.DoesNotExist:
+        raise Http404
+    if post.author_id != author.pk:
+        raise Http404
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        ordering=('created', 'pk'))
+    comments = paginator.get_page(
+        request.GET.get(paginator.cursor_query_param))
+    if request.is_ajax():
+        # «Показать еще» подгружает только следующую порцию комментариев.
+        return render(request, 'includes/comment_list.html',
+                      {'comments': comments})
     form = CommentForm()
     context = {
         'author': author,
         'post': post,
+        'comments': comments,
         'form': form,
     }
     return render(request, 'post.html', context)
@@ -84,7 +142,8 @@ def new_post(request):
         if form.is_valid():
             instance = form.save(commit=False)
             instance.author = request.user
-            instance.save()
+            with transaction.atomic():
+                instance.save()
             return redirect('index')
         return render(request, 'new_post.html', context)
     return render(request, 'new_post.html', context)
@@ -132,19 +191,24 @@ def add_comment(request, username, post_id):
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
         return redirect('post', username, post_id)
     return redirect('post', username, post_id)
 
 
 @login_required
+@condition(etag_func=follow_etag)
 def follow_index(request):
     """View-функция для просмотра постов авторов, на которых подписан."""
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = timeline.follow_posts(request.user).select_related(
+        'author', 'group')
     page = paginator_page(
-        request, posts, settings.ITEMS_PER_PAGE, Paginator)
+        request, posts, settings.ITEMS_PER_PAGE, CursorPaginator)
+    attach_cards(page)
     context = {'page': page}
-    return render(request, 'follow.html', context)
+    return render(request, 'follow.html', context,
+                  using=settings.FEED_TEMPLATE_ENGINE)
 
 
 @login_required
@@ -155,10 +219,11 @@ def profile_follow(request, username):
         return redirect('profile', username)
 
     try:
-        Follow.objects.create(
-            user=request.user,
-            author=author
-        )
+        with transaction.atomic():
+            Follow.objects.create(
+                user=request.user,
+                author=author
+            )
     except IntegrityError:
         return redirect('profile', username)
     return redirect('profile', username)
@@ -168,5 +233,6 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follow = get_object_or_404(Follow, user=request.user, author=author)
-    follow.delete()
+    with transaction.atomic():
+        follow.delete()
     return redirect('profile', username)
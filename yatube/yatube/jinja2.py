@@ -0,0 +1,74 @@
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template.defaultfilters import linebreaksbr
+from django.urls import reverse
+from django.utils import dateformat, formats, timezone
+from jinja2 import Environment, FileSystemBytecodeCache
+from sorl.thumbnail import default
+
+from users.templatetags.user_filters import addclass
+
+logger = logging.getLogger(__name__)
+
+
+def url(viewname, *args, **kwargs):
+    """Аналог тега {% url %}: url('post', username, post.id)."""
+    return reverse(viewname, args=args, kwargs=kwargs)
+
+
+def thumbnail(file_, geometry, **options):
+    """Аналог тега {% thumbnail %} из sorl-thumbnail.
+
+    Как и тег, для пустого файла или при ошибке возвращает None, и
+    шаблон просто пропускает изображение.
+    """
+    if not file_:
+        return None
+    try:
+        return default.backend.get_thumbnail(file_, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось получить миниатюру для %s', file_)
+        return None
+
+
+def now(format_string):
+    """Аналог тега {% now %}."""
+    return dateformat.format(timezone.localtime(), format_string)
+
+
+def finalize(value):
+    """Выводить значения так же, как шаблоны Django.
+
+    Даты переводятся в местное время и форматируются по
+    DATETIME_FORMAT, числа — по правилам локализации.
+    """
+    return formats.localize(timezone.template_localtime(value))
+
+
+def environment(**options):
+    """Окружение Jinja2 для шаблонов лент (FEED_TEMPLATE_ENGINE).
+
+    Скомпилированные шаблоны сохраняются в JINJA2_BYTECODE_CACHE_DIR
+    (по умолчанию во временный каталог), так что новый процесс не
+    разбирает их заново.
+    """
+    directory = settings.JINJA2_BYTECODE_CACHE_DIR
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    options.setdefault('bytecode_cache', FileSystemBytecodeCache(directory))
+    options.setdefault('finalize', finalize)
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': staticfiles_storage.url,
+        'thumbnail': thumbnail,
+        'now': now,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'linebreaksbr': linebreaksbr,
+    })
+    return env
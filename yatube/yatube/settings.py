@@ -20,11 +20,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'posts.apps.PostsConfig',
+    'core.apps.CoreConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
     'rest_framework',
-    'api',
+    'api.apps.ApiConfig',
     
     'djoser',
 
@@ -32,6 +35,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryCountMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,8 +62,25 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2'), ],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'yatube.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    },
 ]
 
+# Engine for the feed pages (index, group, profile, follow) and post
+# cards: 'django' or 'jinja2' (templates in jinja2/ and posts/jinja2/)
+FEED_TEMPLATE_ENGINE = os.getenv('FEED_TEMPLATE_ENGINE', 'django')
+# Compiled Jinja2 templates; None means a directory in the system tmp
+JINJA2_BYTECODE_CACHE_DIR = os.getenv('JINJA2_BYTECODE_CACHE_DIR')
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
@@ -73,6 +95,27 @@ DATABASES = {
     }
 }
 
+# Read replicas as "host:port,host:port"; reads are routed by
+# core.routers.ReplicaRouter, tests read replicas from default.
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+        filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host,
+        PORT=port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Reads stay on the primary this long after a client's write
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -108,33 +151,128 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 LOGIN_URL = 'index'
 
 # Email backend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Mail is queued as a background job and sent by the worker through
+# QUEUED_EMAIL_BACKEND
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Background jobs (core.jobs), executed by `manage.py run_jobs`
+JOB_CONCURRENCY = 4
+JOB_MAX_ATTEMPTS = 3
+# Seconds before the first retry, doubled after every failed attempt
+JOB_RETRY_DELAY = 30
+# Running jobs older than this are assumed lost and claimed again
+JOB_TIMEOUT = 60 * 10
+JOB_POLL_INTERVAL = 1
+JOB_KEEP_FINISHED = 60 * 60 * 24 * 7
+
+# SQL instrumentation: per-request query count and time in response
+# headers, repeated queries (N+1) logged as warnings
+QUERY_INSTRUMENTATION = bool(os.environ.get('QUERY_INSTRUMENTATION'))
+QUERY_REPEAT_THRESHOLD = 3
+
+# Serve API post and comment lists from .values() rows (api.rows)
+API_FAST_LIST = True
+
+# Rows fetched per server-side cursor round trip by NDJSON exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Max posts accepted by POST /api/v1/posts/bulk/
+BULK_POSTS_MAX = 500
+# Max ids accepted by GET /api/v1/posts/batch/
+BATCH_POSTS_MAX = 300
+
+# Full-text search configuration for Post.search_vector
+SEARCH_CONFIG = 'russian'
+
 # Items per page
 ITEMS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
+# Follow timelines: posts of authors with more followers than the limit
+# are read on demand instead of being copied into every timeline
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BACKFILL_SIZE = 100
 
 # Media settings
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Thumbnails are generated by a background job when a post image is
+# saved; templates only look them up. Keep POST_THUMBNAILS in sync with
+# the {% thumbnail %} tags in the templates.
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedThumbnailBackend'
+# Looks up the thumbnails of a whole page of cards in one round-trip
+THUMBNAIL_KVSTORE = 'posts.thumbnails.BatchedKVStore'
+# How long a render miss waits before it may queue the same job again
+THUMBNAIL_SCHEDULE_TIMEOUT = 60
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+# Uploaded images are re-encoded without metadata and capped at
+# IMAGE_MAX_SIZE on the longer side; responsive variants are cut to the
+# post card aspect at POST_IMAGE_WIDTHS (see posts.images)
+IMAGE_MAX_SIZE = 2048
+IMAGE_QUALITY = 85
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_ASPECT = (960, 339)
+
 # Cache
+# The index page is invalidated by bumping a generation on every change,
+# so it can stay cached much longer than a fixed TTL would allow
+INDEX_CACHE_TIMEOUT = 60 * 60 * 6
+# Rendered post cards are keyed by post version and never go stale
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Post detail objects (posts.loaders) are deleted on every change
+POST_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+# Web processes and the job worker invalidate each other's entries (feed
+# generations, post details, cards), so the cache has to be shared:
+# MEMCACHED_LOCATION lists memcached servers separated by commas.
+# LocMemCache is per-process and only fits tests and a lone runserver.
+# JWT revocations (api.authentication) must not be evicted, so they live
+# in a database table created by `manage.py createcachetable`; requests
+# read copies from the default cache and query it only on a miss. Rows
+# live at most as long as a refresh token. Culling at MAX_ENTRIES drops
+# expired rows first, which keeps the table (and the COUNT(*) run on
+# every write) bounded; live rows are dropped only if more than
+# MAX_ENTRIES revocations are live at once.
+MEMCACHED_LOCATION = os.getenv('MEMCACHED_LOCATION')
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'token_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
+if MEMCACHED_LOCATION:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': MEMCACHED_LOCATION.split(','),
+    }
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
 
 
 
 }
+DJOSER = {
+    'SERIALIZERS': {
+        'user': 'api.serializers.UserSerializer',
+        'current_user': 'api.serializers.UserSerializer',
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -0,0 +1,8 @@
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# A second database for core.tests.test_routers: in tests it mirrors the
+# default one, so a read routed there sees committed rows over its own
+# connection. Run with `manage.py test --settings yatube.test_settings`.
+DATABASES.setdefault('replica_1', dict(
+    DATABASES['default'], TEST={'MIRROR': 'default'}))